@@ -3,22 +3,92 @@ AWS Configuration Management
 Auto-detects account settings and manages deployment configuration
 """
 
-import boto3
 import json
 import os
 from pathlib import Path
 
+MAX_POOL_CONNECTIONS = 50
+
+IMDS_URL = 'http://169.254.169.254/latest'
+
+def _on_ec2():
+    """Cheap local check for an EC2 host, so other machines never wait on IMDS"""
+    try:
+        return Path('/sys/devices/virtual/dmi/id/board_vendor').read_text().strip() == 'Amazon EC2'
+    except OSError:
+        return False
+
+def instance_identity():
+    """Identity of the EC2 instance profile read from IMDSv2, or None.
+
+    Only used when no explicit credentials are configured, since those take
+    precedence over the instance profile in the boto3 credential chain.
+    """
+    if any(os.environ.get(var) for var in ('AWS_ACCESS_KEY_ID', 'AWS_PROFILE')):
+        return None
+    if os.environ.get('AWS_EC2_METADATA_DISABLED', '').lower() == 'true' or not _on_ec2():
+        return None
+    try:
+        import requests
+        token = requests.put(f'{IMDS_URL}/api/token', timeout=0.2,
+                             headers={'X-aws-ec2-metadata-token-ttl-seconds': '60'}).text
+        response = requests.get(f'{IMDS_URL}/meta-data/iam/info', timeout=0.2,
+                                headers={'X-aws-ec2-metadata-token': token})
+        info = response.json()
+        if response.status_code != 200 or info.get('Code') != 'Success':
+            return None
+        # arn:aws:iam::<account>:instance-profile/<name>
+        arn = info['InstanceProfileArn']
+        return {'Account': arn.split(':')[4], 'Arn': arn, 'UserId': info['InstanceProfileId']}
+    except Exception:
+        return None
+
 class AWSConfig:
     """Dynamic AWS configuration based on current account"""
     
-    def __init__(self):
-        self._sts = boto3.client('sts')
-        self._session = boto3.Session()
+    def __init__(self, session=None):
+        """
+        Args:
+            session: Optional boto3 Session to build clients from, defaults to boto3's default session
+        """
+        import boto3
+        self._clients = {}
+        self._identity = None
+        # (mtime_ns, parsed deployment.json), re-read only when the file changes
+        self._deployment_cache = None
+        self._client_session = session
+        self._sts = self.client('sts')
+        self._session = session or boto3.Session()
+    
+    def client(self, service_name):
+        """Get a boto3 client, reusing one already created by this config"""
+        import boto3
+        from botocore.config import Config
+        if service_name not in self._clients:
+            factory = self._client_session.client if self._client_session else boto3.client
+            # Larger pool for concurrent callers, adaptive retries to ride out IAM/Lambda throttling
+            self._clients[service_name] = factory(service_name, config=Config(
+                max_pool_connections=MAX_POOL_CONNECTIONS,
+                retries={'mode': 'adaptive', 'max_attempts': 10}
+            ))
+        return self._clients[service_name]
         
+    def identity(self):
+        """Get the caller identity, calling STS only once per config"""
+        if self._identity is None:
+            self._identity = self._sts.get_caller_identity()
+        return self._identity
+    
     @property
     def account_id(self):
         """Get current AWS account ID"""
-        return self._sts.get_caller_identity()['Account']
+        return self.identity()['Account']
+    
+    @property
+    def access_key_id(self):
+        """Access key of the local AWS credentials, resolved without an API call"""
+        credentials = self._session.get_credentials()
+        return credentials.access_key if credentials else None
     
     @property
     def region(self):
@@ -42,7 +112,7 @@ class AWSConfig:
     def get_api_gateway_url(self):
         """Get deployed API Gateway URL from CloudFormation"""
         try:
-            cf = boto3.client('cloudformation')
+            cf = self.client('cloudformation')
             outputs = cf.describe_stacks(StackName=self.stack_name)['Stacks'][0]['Outputs']
             return next(o['OutputValue'] for o in outputs if o['OutputKey'] == 'ApiGatewayUrl')
         except Exception:
@@ -68,15 +138,22 @@ class AWSConfig:
     def load_deployment_config(self):
         """Load saved deployment configuration"""
         config_file = Path(__file__).parent / 'deployment.json'
-        if config_file.exists():
+        try:
+            mtime = config_file.stat().st_mtime_ns
+        except OSError:
+            self._deployment_cache = None
+            return None
+        
+        if self._deployment_cache is None or self._deployment_cache[0] != mtime:
             with open(config_file) as f:
-                return json.load(f)
-        return None
+                self._deployment_cache = (mtime, json.load(f))
+        # Callers may modify the result, so never hand out the cached dict itself
+        return dict(self._deployment_cache[1])
     
     def is_deployed(self):
         """Check if infrastructure is deployed"""
         try:
-            cf = boto3.client('cloudformation')
+            cf = self.client('cloudformation')
             cf.describe_stacks(StackName=self.stack_name)
             return True
         except Exception:
@@ -1,7 +1,26 @@
+# The deployment zip contains only this file, so stick to the runtime's stdlib and boto3
 import json
 import boto3
+import hashlib
 import os
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+
+# Created once per execution environment and reused across warm invocations
+STS_CLIENT = boto3.client('sts')
+
+# Environment variables holding per-service configuration
+SERVICE_PREFIX = 'SERVICE_'
+SERVICE_PREFIX_LEN = len(SERVICE_PREFIX)
+
+# Assumed-role credentials keyed by (service, duration) -> (credentials, expiration)
+_CRED_CACHE = {}
+# Clients treat credentials as expired 10 minutes early (CREDENTIAL_REFRESH_MARGIN in
+# src/universal_auth.py), so only hand out cached sets with more life left than that
+CRED_CACHE_MARGIN = timedelta(minutes=15)
+
+def get_universal_role_arn():
+    """Build the universal service role ARN for this account"""
+    return f"arn:aws:iam::{os.environ['AWS_ACCOUNT_ID']}:role/service-role/universal-s3-access-role"
 
 def get_service_config():
     """Load service configuration from environment variables"""
@@ -10,25 +29,33 @@ def get_service_config():
     
     # Add universal service
     services['universal'] = {
-        'role': f"arn:aws:iam::{os.environ['AWS_ACCOUNT_ID']}:role/service-role/universal-s3-access-role",
+        'role': get_universal_role_arn(),
         'buckets': ['*']
     }
     
     # Load services from environment variables
     for key, value in os.environ.items():
-        if key.startswith('SERVICE_'):
-            service_name = key[8:].lower()  # Remove 'SERVICE_' prefix
-            try:
-                services[service_name] = json.loads(value)
-            except json.JSONDecodeError:
-                continue
+        if not key.startswith(SERVICE_PREFIX):
+            continue
+        try:
+            services[key[SERVICE_PREFIX_LEN:].lower()] = json.loads(value)
+        except json.JSONDecodeError:
+            continue
     
     return services
 
+# Parse service configuration at cold start; defer to first request if the
+# environment is not ready yet (e.g. AWS_ACCOUNT_ID missing at import time)
+try:
+    SERVICE_CONFIG = get_service_config()
+except KeyError:
+    SERVICE_CONFIG = None
+
 def lambda_handler(event, context):
     """
     S3Bridge credential service - returns temporary AWS credentials for registered services
     """
+    global SERVICE_CONFIG
     
     try:
         # Extract parameters
@@ -43,8 +70,11 @@ def lambda_handler(event, context):
             }
         
         # Load service configuration
-        service_roles = get_service_config()
-        service_config = service_roles.get(service_name)
+        if SERVICE_CONFIG is None:
+            SERVICE_CONFIG = get_service_config()
+        
+        # A SERVICE_UNIVERSAL entry may override the built-in universal role
+        service_config = SERVICE_CONFIG.get(service_name)
         
         if not service_config:
             return {
@@ -54,21 +84,39 @@ def lambda_handler(event, context):
         
         role_arn = service_config['role']
         
-        # Assume role
-        sts_client = boto3.client('sts')
-        response = sts_client.assume_role(
-            RoleArn=role_arn,
-            RoleSessionName=f"{service_name}-session-{int(datetime.now().timestamp())}",
-            DurationSeconds=min(duration, 3600)
-        )
+        duration = min(duration, 3600)
+        
+        # Reuse cached credentials while they have enough life left
+        cache_key = (service_name, duration)
+        cached = _CRED_CACHE.get(cache_key)
+        if cached and cached[1] - datetime.now(timezone.utc) > CRED_CACHE_MARGIN:
+            credentials = cached[0]
+        else:
+            # Assume role
+            response = STS_CLIENT.assume_role(
+                RoleArn=role_arn,
+                RoleSessionName=f"{service_name}-session",
+                DurationSeconds=duration
+            )
+            
+            credentials = response['Credentials']
+            _CRED_CACHE[cache_key] = (credentials, credentials['Expiration'])
         
-        credentials = response['Credentials']
+        # The ETag names the credential set, so a client still holding it gets a bodyless 304
+        etag = '"' + hashlib.sha256(credentials['AccessKeyId'].encode()).hexdigest()[:16] + '"'
+        headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+        if headers.get('if-none-match') == etag:
+            return {
+                'statusCode': 304,
+                'headers': {'ETag': etag, 'Access-Control-Allow-Origin': '*'}
+            }
         
         return {
             'statusCode': 200,
             'headers': {
                 'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
+                'Access-Control-Allow-Origin': '*',
+                'ETag': etag
             },
             'body': json.dumps({
                 'AccessKeyId': credentials['AccessKeyId'],
@@ -0,0 +1,124 @@
+"""
+Service Helpers
+Shared IAM policy and credential service helpers for the service management scripts
+"""
+
+import json
+from functools import partial
+
+# orjson is optional; fall back to stdlib json when it is not installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Credential service whose environment holds the per-service configuration
+FUNCTION_NAME = 's3bridge-credential-service'
+SERVICE_PREFIX = 'SERVICE_'
+SERVICE_PREFIX_LEN = len(SERVICE_PREFIX)
+
+# S3 permissions based on access level
+S3_ACTIONS = {
+    'read-only': ['s3:GetObject', 's3:ListBucket'],
+    'read-write': ['s3:GetObject', 's3:PutObject', 's3:DeleteObject', 's3:ListBucket'],
+    'admin': ['s3:*']
+}
+
+# Compact JSON for IAM policies and Lambda env vars, both of which are size-capped
+dumps = partial(json.dumps, separators=(',', ':'))
+
+def bucket_resources(bucket_patterns):
+    """Create S3 resource ARNs (bucket and objects) from bucket patterns"""
+    s3_resources = []
+    for pattern in bucket_patterns:
+        s3_resources.extend([
+            f"arn:aws:s3:::{pattern}",
+            f"arn:aws:s3:::{pattern}/*"
+        ])
+    return s3_resources
+
+def build_policy_doc(bucket_patterns, permissions):
+    """Build the inline S3 access policy for a service role"""
+    return {
+        "Version": "2012-10-17",
+        "Statement": [{
+            "Effect": "Allow",
+            "Action": S3_ACTIONS[permissions],
+            "Resource": bucket_resources(bucket_patterns)
+        }]
+    }
+
+# Left to botocore's adaptive retries; if those are exhausted the error is re-raised, not swallowed
+THROTTLING_CODES = frozenset({
+    'Throttling',
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded'
+})
+
+def error_code(error):
+    """Get the AWS error code from a botocore ClientError"""
+    return error.response.get('Error', {}).get('Code', '')
+
+def is_throttling(error):
+    """Check whether an exception is a throttling ClientError that outlasted the retries"""
+    response = getattr(error, 'response', None)
+    return isinstance(response, dict) and response.get('Error', {}).get('Code', '') in THROTTLING_CODES
+
+def parse_service_env(env_vars):
+    """Build the service map from the credential Lambda's environment variables"""
+    services = {}
+    for key, value in env_vars.items():
+        if not key.startswith(SERVICE_PREFIX):
+            continue
+        try:
+            services[key[SERVICE_PREFIX_LEN:].lower()] = json_loads(value)
+        except ValueError:
+            continue
+    
+    # Add universal service
+    account_id = env_vars.get('AWS_ACCOUNT_ID')
+    if account_id:
+        services['universal'] = {
+            'role': f"arn:aws:iam::{account_id}:role/service-role/s3bridge-access-role",
+            'buckets': ['*']
+        }
+    
+    return services
+
+def get_lambda_env_vars(config):
+    """Fetch the credential service environment variables"""
+    lambda_client = config.client('lambda')
+    response = lambda_client.get_function_configuration(FunctionName=FUNCTION_NAME)
+    return response.get('Environment', {}).get('Variables', {})
+
+def update_lambda_env(config, changes, env_vars=None):
+    """Apply changes (None drops a key) to the credential service environment.
+    
+    Pass env_vars already fetched by the caller to skip a second
+    get_function_configuration round-trip.
+    """
+    from botocore.exceptions import ClientError
+    try:
+        if env_vars is None:
+            env_vars = get_lambda_env_vars(config)
+        
+        for key, value in changes.items():
+            if value is None:
+                env_vars.pop(key, None)
+            else:
+                env_vars[key] = value
+        config.client('lambda').update_function_configuration(
+            FunctionName=FUNCTION_NAME,
+            Environment={'Variables': env_vars}
+        )
+        return True
+    except ClientError as e:
+        code = error_code(e)
+        if code in THROTTLING_CODES:
+            raise
+        if code == 'ResourceNotFoundException':
+            print(f"Lambda function {FUNCTION_NAME} not found")
+        else:
+            print(f"Failed to update Lambda configuration: {e}")
+        return False
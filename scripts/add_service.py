@@ -4,22 +4,36 @@ Add Service Script
 Creates IAM role and updates Lambda configuration for new service
 """
 
-import boto3
-import json
 import argparse
 import sys
 import os
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.aws_config import AWSConfig
+from scripts._service_helpers import (
+    THROTTLING_CODES, build_policy_doc, dumps as _dumps, error_code, is_throttling
+)
 
-def find_existing_api_gateway():
+def get_integration_uri(api_client, api_id, resource_id):
+    """Get the GET integration URI for an API resource"""
+    try:
+        integration = api_client.get_integration(
+            restApiId=api_id,
+            resourceId=resource_id,
+            httpMethod='GET'
+        )
+        return integration.get('uri', '')
+    except Exception:
+        return ''
+
+def find_existing_api_gateway(config):
     """Find existing API Gateway that uses s3bridge-credential-service"""
     try:
-        api_client = boto3.client('apigateway')
-        lambda_client = boto3.client('lambda')
+        api_client = config.client('apigateway')
+        lambda_client = config.client('lambda')
         
         # Get s3bridge-credential-service function ARN
         try:
@@ -31,33 +45,31 @@ def find_existing_api_gateway():
         # List all APIs
         apis = api_client.get_rest_apis()
         
+        # Collect resources with a GET method
+        probes = []
         for api in apis['items']:
             api_id = api['id']
             try:
-                # Get resources for this API
                 resources = api_client.get_resources(restApiId=api_id)
-                
-                for resource in resources['items']:
-                    # Check if this resource has GET method
-                    if 'GET' in resource.get('resourceMethods', {}):
-                        try:
-                            # Get integration for GET method
-                            integration = api_client.get_integration(
-                                restApiId=api_id,
-                                resourceId=resource['id'],
-                                httpMethod='GET'
-                            )
-                            
-                            # Check if integration points to our Lambda function
-                            integration_uri = integration.get('uri', '')
-                            if 's3bridge-credential-service' in integration_uri:
-                                return api_id
-                                
-                        except Exception:
-                            continue
-                            
             except Exception:
                 continue
+            
+            for resource in resources['items']:
+                if 'GET' in resource.get('resourceMethods', {}):
+                    probes.append((api_id, resource['id']))
+        
+        # Check integrations concurrently and stop at the first one pointing to our Lambda function
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            futures = {
+                executor.submit(get_integration_uri, api_client, api_id, resource_id): api_id
+                for api_id, resource_id in probes
+            }
+            
+            for future in as_completed(futures):
+                if 's3bridge-credential-service' in future.result():
+                    for pending in futures:
+                        pending.cancel()
+                    return futures[future]
                 
         return None
         
@@ -68,33 +80,11 @@ def find_existing_api_gateway():
 def create_service_role(service_name, bucket_patterns, permissions, config):
     """Create IAM role for service"""
     
-    iam = boto3.client('iam')
+    iam = config.client('iam')
     role_name = f"{service_name}-s3-access-role"
     
-    # S3 permissions based on access level
-    s3_actions = {
-        'read-only': ['s3:GetObject', 's3:ListBucket'],
-        'read-write': ['s3:GetObject', 's3:PutObject', 's3:DeleteObject', 's3:ListBucket'],
-        'admin': ['s3:*']
-    }
-    
-    # Create S3 resources from bucket patterns
-    s3_resources = []
-    for pattern in bucket_patterns:
-        s3_resources.extend([
-            f"arn:aws:s3:::{pattern}",
-            f"arn:aws:s3:::{pattern}/*"
-        ])
-    
     # IAM policy document
-    policy_doc = {
-        "Version": "2012-10-17",
-        "Statement": [{
-            "Effect": "Allow",
-            "Action": s3_actions[permissions],
-            "Resource": s3_resources
-        }]
-    }
+    policy_doc = build_policy_doc(bucket_patterns, permissions)
     
     # Trust policy for Lambda role
     trust_policy = {
@@ -111,7 +101,7 @@ def create_service_role(service_name, bucket_patterns, permissions, config):
         iam.create_role(
             RoleName=role_name,
             Path='/service-role/',
-            AssumeRolePolicyDocument=json.dumps(trust_policy),
+            AssumeRolePolicyDocument=_dumps(trust_policy),
             Description=f"S3Bridge service role for {service_name}"
         )
         
@@ -119,7 +109,7 @@ def create_service_role(service_name, bucket_patterns, permissions, config):
         iam.put_role_policy(
             RoleName=role_name,
             PolicyName=f"{service_name}S3AccessPolicy",
-            PolicyDocument=json.dumps(policy_doc)
+            PolicyDocument=_dumps(policy_doc)
         )
         
         print(f"Created IAM role: {role_name}")
@@ -132,15 +122,16 @@ def create_service_role(service_name, bucket_patterns, permissions, config):
         iam.put_role_policy(
             RoleName=role_name,
             PolicyName=f"{service_name}S3AccessPolicy",
-            PolicyDocument=json.dumps(policy_doc)
+            PolicyDocument=_dumps(policy_doc)
         )
         
         return config.service_role_arn(service_name)
 
-def update_lambda_config_only(service_name, bucket_patterns, role_arn, force=False):
+def update_lambda_config_only(service_name, bucket_patterns, role_arn, config, force=False):
     """Update Lambda environment variables instead of code"""
+    from botocore.exceptions import ClientError
     
-    lambda_client = boto3.client('lambda')
+    lambda_client = config.client('lambda')
     
     try:
         # Get current environment variables
@@ -161,7 +152,7 @@ def update_lambda_config_only(service_name, bucket_patterns, role_arn, force=Fal
             'role': role_arn,
             'buckets': bucket_patterns
         }
-        env_vars[service_env_key] = json.dumps(service_config)
+        env_vars[service_env_key] = _dumps(service_config)
         
         # Update Lambda environment
         lambda_client.update_function_configuration(
@@ -172,13 +163,15 @@ def update_lambda_config_only(service_name, bucket_patterns, role_arn, force=Fal
         print(f"Updated Lambda environment for service: {service_name}")
         return True
         
-    except Exception as e:
+    except ClientError as e:
+        if error_code(e) in THROTTLING_CODES:
+            raise
         print(f"Failed to update Lambda environment: {e}")
         return False
 
-def check_and_create_buckets(bucket_patterns):
+def check_and_create_buckets(bucket_patterns, config):
     """Check if buckets exist and offer to create them"""
-    s3 = boto3.client('s3')
+    s3 = config.client('s3')
     
     # Extract actual bucket names from patterns (remove wildcards)
     bucket_names = []
@@ -216,7 +209,7 @@ def add_service(service_name, bucket_patterns, permissions='read-write', force=F
     config = AWSConfig()
     
     # Check if infrastructure is deployed (either CloudFormation or existing API Gateway)
-    existing_api = find_existing_api_gateway()
+    existing_api = find_existing_api_gateway(config)
     if not config.is_deployed() and not existing_api:
         print("S3Bridge not deployed. Run setup first:")
         print("   python scripts/setup.py")
@@ -227,32 +220,20 @@ def add_service(service_name, bucket_patterns, permissions='read-write', force=F
     print(f"Permissions: {permissions}")
     
     # Check and optionally create buckets
-    check_and_create_buckets(bucket_patterns)
+    check_and_create_buckets(bucket_patterns, config)
     
     try:
         # Create IAM role
         role_arn = create_service_role(service_name, bucket_patterns, permissions, config)
         
-        # Check for existing API Gateway
-        existing_api = find_existing_api_gateway()
+        # Reuse the API Gateway found during the deployment check
         if existing_api:
             print(f"Found existing API Gateway: {existing_api}")
             print(f"Will update existing endpoint instead of creating new one")
-            # Update Lambda function code only
-            success = update_lambda_config_only(service_name, bucket_patterns, role_arn, force)
+            # Services are read from environment variables, so no code upload is needed
+            success = update_lambda_config_only(service_name, bucket_patterns, role_arn, config, force)
             if not success:
                 return False
-            
-            # Deploy Lambda changes only
-            print(f"Deploying Lambda changes only...")
-            import subprocess
-            result = subprocess.run([sys.executable, str(Path(__file__).parent / 'deploy_lambda_only.py')], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                print(f"Lambda deployment successful")
-            else:
-                print(f"Lambda deployment failed: {result.stderr}")
-                return False
         else:
             print(f"No existing API Gateway found")
             print(f"Run setup script to deploy infrastructure first:")
@@ -268,10 +249,13 @@ def add_service(service_name, bucket_patterns, permissions='read-write', force=F
         return True
         
     except Exception as e:
+        # Throttling re-raised by the helpers is not a plain failure, let it reach the caller
+        if is_throttling(e):
+            raise
         print(f"Failed to add service: {e}")
         return False
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Add service to S3Bridge')
     parser.add_argument('service_name', help='Service name (e.g., analytics, webapp)')
     parser.add_argument('bucket_patterns', help='Comma-separated bucket patterns (e.g., "app-*,*-data")')
@@ -280,7 +264,7 @@ def main():
     parser.add_argument('--force', action='store_true', help='Overwrite existing service without confirmation')
 
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Parse bucket patterns
     bucket_patterns = [p.strip() for p in args.bucket_patterns.split(',')]
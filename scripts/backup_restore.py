@@ -4,25 +4,53 @@ Backup and Restore Script
 Backup/restore service configurations for S3Bridge
 """
 
-import boto3
 import json
 import argparse
 import sys
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# orjson is optional; fall back to stdlib json when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.aws_config import AWSConfig
+from scripts._service_helpers import dumps as _dumps
 
-def backup_services(backup_file=None):
+def fetch_role_detail(iam, role):
+    """Fetch inline policies for a service role"""
+    role_name = role['RoleName']
+    service_name = role_name.replace('-s3-access-role', '')
+    
+    # Get role policies
+    policies_response = iam.list_role_policies(RoleName=role_name)
+    role_policies = {}
+    
+    for policy_name in policies_response['PolicyNames']:
+        policy_response = iam.get_role_policy(RoleName=role_name, PolicyName=policy_name)
+        role_policies[policy_name] = policy_response['PolicyDocument']
+    
+    return service_name, {
+        'role_name': role_name,
+        'arn': role['Arn'],
+        'assume_role_policy': role['AssumeRolePolicyDocument'],
+        'policies': role_policies,
+        'description': role.get('Description', '')
+    }
+
+def backup_services(backup_file=None, config=None):
     """Backup all service configurations"""
     
     if not backup_file:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_file = f"services_backup_{timestamp}.json"
     
-    config = AWSConfig()
+    config = config or AWSConfig()
     backup_data = {
         'timestamp': datetime.now().isoformat(),
         'account_id': config.account_id,
@@ -33,7 +61,7 @@ def backup_services(backup_file=None):
     
     try:
         # Backup Lambda configuration
-        lambda_client = boto3.client('lambda')
+        lambda_client = config.client('lambda')
         response = lambda_client.get_function_configuration(FunctionName='s3bridge-credential-service')
         env_vars = response.get('Environment', {}).get('Variables', {})
         
@@ -46,33 +74,26 @@ def backup_services(backup_file=None):
                     continue
         
         # Backup IAM roles
-        iam = boto3.client('iam')
-        roles_response = iam.list_roles(PathPrefix='/service-role/')
+        iam = config.client('iam')
+        service_roles = []
+        paginator = iam.get_paginator('list_roles')
         
-        for role in roles_response['Roles']:
-            role_name = role['RoleName']
-            if role_name.endswith('-s3-access-role'):
-                service_name = role_name.replace('-s3-access-role', '')
-                
-                # Get role policies
-                policies_response = iam.list_role_policies(RoleName=role_name)
-                role_policies = {}
-                
-                for policy_name in policies_response['PolicyNames']:
-                    policy_response = iam.get_role_policy(RoleName=role_name, PolicyName=policy_name)
-                    role_policies[policy_name] = policy_response['PolicyDocument']
-                
-                backup_data['iam_roles'][service_name] = {
-                    'role_name': role_name,
-                    'arn': role['Arn'],
-                    'assume_role_policy': role['AssumeRolePolicyDocument'],
-                    'policies': role_policies,
-                    'description': role.get('Description', '')
-                }
+        for page in paginator.paginate(PathPrefix='/service-role/'):
+            service_roles.extend(role for role in page['Roles']
+                                 if role['RoleName'].endswith('-s3-access-role'))
+        
+        # Fetch role policies concurrently (one shared client)
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            for service_name, role_detail in executor.map(lambda role: fetch_role_detail(iam, role), service_roles):
+                backup_data['iam_roles'][service_name] = role_detail
         
         # Save backup
-        with open(backup_file, 'w') as f:
-            json.dump(backup_data, f, indent=2, default=str)
+        if orjson:
+            with open(backup_file, 'wb') as f:
+                f.write(orjson.dumps(backup_data, option=orjson.OPT_INDENT_2, default=str))
+        else:
+            with open(backup_file, 'w') as f:
+                json.dump(backup_data, f, indent=2, default=str)
         
         print(f"Backup saved to: {backup_file}")
         print(f"Services backed up: {len(backup_data['services'])}")
@@ -84,12 +105,43 @@ def backup_services(backup_file=None):
         print(f"Backup failed: {e}")
         return False
 
-def restore_services(backup_file, dry_run=False):
+def restore_role(iam, service_name, role_data):
+    """Restore a single IAM role and its inline policies"""
+    role_name = role_data['role_name']
+    
+    try:
+        # Create role
+        iam.create_role(
+            RoleName=role_name,
+            Path='/service-role/',
+            AssumeRolePolicyDocument=_dumps(role_data['assume_role_policy']),
+            Description=role_data.get('description', f"Restored service role for {service_name}")
+        )
+        
+        # Attach policies
+        for policy_name, policy_doc in role_data['policies'].items():
+            iam.put_role_policy(
+                RoleName=role_name,
+                PolicyName=policy_name,
+                PolicyDocument=_dumps(policy_doc)
+            )
+        
+        print(f"Restored IAM role: {role_name}")
+        return True
+        
+    except iam.exceptions.EntityAlreadyExistsException:
+        print(f"IAM role {role_name} already exists, skipping")
+        return True
+    except Exception as e:
+        print(f"Failed to restore IAM role {role_name}: {e}")
+        return False
+
+def restore_services(backup_file, dry_run=False, config=None):
     """Restore service configurations from backup"""
     
     try:
-        with open(backup_file, 'r') as f:
-            backup_data = json.load(f)
+        with open(backup_file, 'rb') as f:
+            backup_data = orjson.loads(f.read()) if orjson else json.load(f)
     except Exception as e:
         print(f"Failed to load backup file: {e}")
         return False
@@ -113,42 +165,24 @@ def restore_services(backup_file, dry_run=False):
             print("Restore cancelled")
             return False
     
-    config = AWSConfig()
+    config = config or AWSConfig()
     success = True
     
     # Restore IAM roles
-    iam = boto3.client('iam')
-    for service_name, role_data in iam_roles.items():
-        role_name = role_data['role_name']
-        
-        if dry_run:
-            print(f"[DRY RUN] Would restore IAM role: {role_name}")
-            continue
-        
-        try:
-            # Create role
-            iam.create_role(
-                RoleName=role_name,
-                Path='/service-role/',
-                AssumeRolePolicyDocument=json.dumps(role_data['assume_role_policy']),
-                Description=role_data.get('description', f"Restored service role for {service_name}")
-            )
-            
-            # Attach policies
-            for policy_name, policy_doc in role_data['policies'].items():
-                iam.put_role_policy(
-                    RoleName=role_name,
-                    PolicyName=policy_name,
-                    PolicyDocument=json.dumps(policy_doc)
-                )
-            
-            print(f"Restored IAM role: {role_name}")
+    iam = config.client('iam')
+    if dry_run:
+        for role_data in iam_roles.values():
+            print(f"[DRY RUN] Would restore IAM role: {role_data['role_name']}")
+    else:
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = [
+                executor.submit(restore_role, iam, service_name, role_data)
+                for service_name, role_data in iam_roles.items()
+            ]
             
-        except iam.exceptions.EntityAlreadyExistsException:
-            print(f"IAM role {role_name} already exists, skipping")
-        except Exception as e:
-            print(f"Failed to restore IAM role {role_name}: {e}")
-            success = False
+            for future in as_completed(futures):
+                if not future.result():
+                    success = False
     
     # Restore Lambda configuration
     if services:
@@ -156,14 +190,14 @@ def restore_services(backup_file, dry_run=False):
             print(f"[DRY RUN] Would restore {len(services)} services to Lambda")
         else:
             try:
-                lambda_client = boto3.client('lambda')
+                lambda_client = config.client('lambda')
                 response = lambda_client.get_function_configuration(FunctionName='s3bridge-credential-service')
                 env_vars = response.get('Environment', {}).get('Variables', {})
                 
                 # Add restored services
                 for service_name, service_config in services.items():
                     service_key = f"SERVICE_{service_name.upper()}"
-                    env_vars[service_key] = json.dumps(service_config)
+                    env_vars[service_key] = _dumps(service_config)
                 
                 # Update Lambda function
                 lambda_client.update_function_configuration(
@@ -186,7 +220,7 @@ def restore_services(backup_file, dry_run=False):
     
     return success
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Backup/restore S3Bridge services')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
     
@@ -199,7 +233,7 @@ def main():
     restore_parser.add_argument('file', help='Backup file to restore from')
     restore_parser.add_argument('--dry-run', action='store_true', help='Show what would be restored without making changes')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if not args.command:
         parser.print_help()
@@ -207,15 +241,16 @@ def main():
     
     # Check AWS credentials
     try:
-        boto3.client('sts').get_caller_identity()
+        config = AWSConfig()
+        config.identity()
     except Exception as e:
         print(f"AWS credentials not configured: {e}")
         return 1
     
     if args.command == 'backup':
-        success = backup_services(args.file)
+        success = backup_services(args.file, config)
     elif args.command == 'restore':
-        success = restore_services(args.file, args.dry_run)
+        success = restore_services(args.file, args.dry_run, config)
     
     return 0 if success else 1
 
@@ -4,7 +4,6 @@ Deploy only Lambda functions without touching API Gateway
 For S3Bridge
 """
 
-import boto3
 import zipfile
 import io
 from pathlib import Path
@@ -17,7 +16,7 @@ def create_lambda_zip(lambda_dir, function_name):
     """Create deployment zip for Lambda function"""
     zip_buffer = io.BytesIO()
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zip_file:
         lambda_file = lambda_dir / "universal_credential_service.py"
         if lambda_file.exists():
             zip_file.write(lambda_file, "lambda_function.py")
@@ -54,6 +53,7 @@ def deploy_lambda(lambda_client, function_name, zip_content):
 
 def main():
     """Deploy Lambda functions only"""
+    import boto3
     
     lambda_client = boto3.client('lambda')
     lambda_dir = Path(__file__).parent.parent / 'lambda_functions'
@@ -64,12 +64,12 @@ def main():
     
     print("Deploying Lambda functions only (preserving API Gateway)...")
     
+    # All functions ship the same source file, so build the package once
+    zip_content = create_lambda_zip(lambda_dir, functions[0])
+    
     for function_name in functions:
         print(f"Deploying {function_name}...")
         
-        # Create deployment package
-        zip_content = create_lambda_zip(lambda_dir, function_name)
-        
         # Deploy function
         arn = deploy_lambda(lambda_client, function_name, zip_content)
         if not arn:
@@ -4,7 +4,6 @@ Edit Service Script
 Modifies existing service configuration
 """
 
-import boto3
 import json
 import argparse
 import sys
@@ -13,10 +12,71 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.aws_config import AWSConfig
+from scripts._service_helpers import (
+    THROTTLING_CODES, build_policy_doc, dumps as _dumps, error_code, get_lambda_env_vars, is_throttling,
+    update_lambda_env
+)
+
+def get_current_service_config(service_name, config=None, env_vars=None):
+    """Get current service configuration, or None if the service is not registered"""
+    if env_vars is None:
+        env_vars = get_lambda_env_vars(config or AWSConfig())
+    
+    service_env_key = f'SERVICE_{service_name.upper()}'
+    if service_env_key not in env_vars:
+        return None
+    return json.loads(env_vars[service_env_key])
+
+def update_iam_role_policy(service_name, bucket_patterns, permissions, config=None):
+    """Rewrite the service role's S3 policy for the given buckets and access level"""
+    from botocore.exceptions import ClientError
+    config = config or AWSConfig()
+    iam = config.client('iam')
+    role_name = f"{service_name}-s3-access-role"
+    policy_name = f"{service_name}S3AccessPolicy"
+    try:
+        policy_doc = build_policy_doc(bucket_patterns, permissions)
+        
+        # Skip the write when the role already carries this exact policy
+        try:
+            current = iam.get_role_policy(RoleName=role_name, PolicyName=policy_name)['PolicyDocument']
+            if current == policy_doc:
+                return True
+        except ClientError as e:
+            if error_code(e) != 'NoSuchEntity':
+                raise
+        
+        iam.put_role_policy(
+            RoleName=role_name,
+            PolicyName=policy_name,
+            PolicyDocument=_dumps(policy_doc)
+        )
+        return True
+    except ClientError as e:
+        code = error_code(e)
+        if code in THROTTLING_CODES:
+            raise
+        if code == 'NoSuchEntity':
+            print(f"IAM role {role_name} not found")
+        else:
+            print(f"Failed to update IAM policy: {e}")
+        return False
+
+def update_lambda_config(service_name, bucket_patterns, role_arn, config=None, env_vars=None):
+    """Write the service entry to the Lambda environment.
+    
+    Pass env_vars already fetched by the caller to skip a second
+    get_function_configuration round-trip.
+    """
+    # Only this entry is re-encoded; the others go back as the strings we read
+    service_config = _dumps({
+        'role': role_arn,
+        'buckets': bucket_patterns
+    })
+    return update_lambda_env(config or AWSConfig(), {f'SERVICE_{service_name.upper()}': service_config}, env_vars)
 
 def edit_service(service_name, bucket_patterns=None, permissions=None):
     """Edit existing service configuration"""
-    
     config = AWSConfig()
     
     if not config.is_deployed():
@@ -24,21 +84,14 @@ def edit_service(service_name, bucket_patterns=None, permissions=None):
         return False
     
     try:
-        lambda_client = boto3.client('lambda')
-        iam = boto3.client('iam')
+        # Fetch the environment once and reuse it for the update
+        env_vars = get_lambda_env_vars(config)
+        current_config = get_current_service_config(service_name, env_vars=env_vars)
         
-        # Get current environment variables
-        response = lambda_client.get_function_configuration(FunctionName='s3bridge-credential-service')
-        env_vars = response.get('Environment', {}).get('Variables', {})
-        
-        service_env_key = f'SERVICE_{service_name.upper()}'
-        
-        if service_env_key not in env_vars:
+        if current_config is None:
             print(f"Service '{service_name}' not found")
             return False
         
-        # Get current configuration
-        current_config = json.loads(env_vars[service_env_key])
         print(f"Current configuration for '{service_name}':")
         print(f"  Buckets: {', '.join(current_config['buckets'])}")
         print(f"  Role: {current_config['role']}")
@@ -50,60 +103,33 @@ def edit_service(service_name, bucket_patterns=None, permissions=None):
         
         # Update IAM policy if permissions changed
         if permissions:
-            s3_actions = {
-                'read-only': ['s3:GetObject', 's3:ListBucket'],
-                'read-write': ['s3:GetObject', 's3:PutObject', 's3:DeleteObject', 's3:ListBucket'],
-                'admin': ['s3:*']
-            }
-            
-            # Create S3 resources from bucket patterns
-            s3_resources = []
-            for pattern in current_config['buckets']:
-                s3_resources.extend([
-                    f"arn:aws:s3:::{pattern}",
-                    f"arn:aws:s3:::{pattern}/*"
-                ])
-            
-            # Update IAM policy
-            policy_doc = {
-                "Version": "2012-10-17",
-                "Statement": [{
-                    "Effect": "Allow",
-                    "Action": s3_actions[permissions],
-                    "Resource": s3_resources
-                }]
-            }
-            
-            role_name = f"{service_name}-s3-access-role"
-            iam.put_role_policy(
-                RoleName=role_name,
-                PolicyName=f"{service_name}S3AccessPolicy",
-                PolicyDocument=json.dumps(policy_doc)
-            )
+            if not update_iam_role_policy(service_name, current_config['buckets'], permissions, config):
+                return False
             print(f"Updated IAM policy with {permissions} permissions")
         
         # Update Lambda environment
-        env_vars[service_env_key] = json.dumps(current_config)
-        lambda_client.update_function_configuration(
-            FunctionName='s3bridge-credential-service',
-            Environment={'Variables': env_vars}
-        )
+        if not update_lambda_config(service_name, current_config['buckets'], current_config['role'],
+                                    config, env_vars):
+            return False
         
         print(f"Service '{service_name}' updated successfully")
         return True
         
     except Exception as e:
+        # Throttling re-raised by the helpers is not a plain failure, let it reach the caller
+        if is_throttling(e):
+            raise
         print(f"Failed to edit service: {e}")
         return False
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Edit service in S3Bridge')
     parser.add_argument('service_name', help='Service name to edit')
     parser.add_argument('--bucket-patterns', help='Comma-separated bucket patterns')
     parser.add_argument('--permissions', choices=['read-only', 'read-write', 'admin'], 
                        help='Access level')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if not args.bucket_patterns and not args.permissions:
         print("Must specify --bucket-patterns or --permissions to edit")
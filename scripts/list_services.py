@@ -4,71 +4,60 @@ List Services Script
 Shows all configured services in the S3Bridge
 """
 
-import boto3
-import json
+import argparse
 import sys
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.aws_config import AWSConfig
+from scripts._service_helpers import parse_service_env
 
-def get_service_config():
+
+def get_service_config(config=None):
     """Load service configuration from Lambda environment variables"""
+    config = config or AWSConfig()
     try:
-        lambda_client = boto3.client('lambda')
+        lambda_client = config.client('lambda')
         response = lambda_client.get_function(FunctionName='s3bridge-credential-service')
         
         env_vars = response['Configuration'].get('Environment', {}).get('Variables', {})
         
-        services = {}
-        for key, value in env_vars.items():
-            if key.startswith('SERVICE_'):
-                service_name = key[8:].lower()
-                try:
-                    services[service_name] = json.loads(value)
-                except json.JSONDecodeError:
-                    continue
-        
-        # Add universal service
-        account_id = env_vars.get('AWS_ACCOUNT_ID')
-        if account_id:
-            services['universal'] = {
-                'role': f"arn:aws:iam::{account_id}:role/service-role/s3bridge-access-role",
-                'buckets': ['*']
-            }
+        services = parse_service_env(env_vars)
         
         return services
     except Exception as e:
         print(f"Failed to load service configuration: {e}")
         return {}
 
-def get_service_roles():
+def get_service_roles(config=None):
     """Get all service roles from IAM"""
+    config = config or AWSConfig()
     try:
-        iam = boto3.client('iam')
-        response = iam.list_roles(PathPrefix='/service-role/')
+        iam = config.client('iam')
         
+        # list_roles returns at most 100 roles per page
         service_roles = {}
-        for role in response['Roles']:
-            role_name = role['RoleName']
-            if role_name.endswith('-s3-access-role'):
-                service_name = role_name.replace('-s3-access-role', '')
-                service_roles[service_name] = {
-                    'arn': role['Arn'],
-                    'created': role['CreateDate'].strftime('%Y-%m-%d %H:%M:%S'),
-                    'description': role.get('Description', '')
-                }
+        for page in iam.get_paginator('list_roles').paginate(PathPrefix='/service-role/'):
+            for role in page['Roles']:
+                role_name = role['RoleName']
+                if role_name.endswith('-s3-access-role'):
+                    service_name = role_name.replace('-s3-access-role', '')
+                    service_roles[service_name] = {
+                        'arn': role['Arn'],
+                        'created': role['CreateDate'].strftime('%Y-%m-%d %H:%M:%S'),
+                        'description': role.get('Description', '')
+                    }
         
         return service_roles
     except Exception as e:
         print(f"Failed to load IAM roles: {e}")
         return {}
 
-def list_services():
+def list_services(config=None):
     """List all configured services"""
     
-    config = AWSConfig()
+    config = config or AWSConfig()
     
     print("S3Bridge - Service Registry")
     print(f"Account: {config.account_id}")
@@ -76,22 +65,24 @@ def list_services():
     print()
     
     # Get service configurations
-    services = get_service_config()
-    roles = get_service_roles()
+    services = get_service_config(config)
+    roles = get_service_roles(config)
     
     if not services and not roles:
         print("No services configured")
         return
     
-    # Combine service info
-    all_services = set(services.keys()) | set(roles.keys())
+    # Combine service info in one pass (dict views support set union)
+    records = [(name, services.get(name), roles.get(name))
+               for name in sorted(services.keys() | roles.keys())]
     
-    print(f"Found {len(all_services)} services:")
+    print(f"Found {len(records)} services:")
     print()
     
-    for service_name in sorted(all_services):
-        service_config = services.get(service_name, {})
-        role_info = roles.get(service_name, {})
+    for service_name, service_config, role_info in records:
+        has_config = service_config is not None
+        has_role = role_info is not None
+        service_config = service_config or {}
         
         print(f"{service_name}")
         
@@ -107,9 +98,6 @@ def list_services():
             print(f"   Role: {service_config['role']}")
         
         # Status
-        has_config = service_name in services
-        has_role = service_name in roles
-        
         if has_config and has_role:
             status = "Active"
         elif has_config and not has_role:
@@ -122,14 +110,18 @@ def list_services():
         print(f"   Status: {status}")
         print()
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='List services in S3Bridge')
+    parser.parse_args(argv)
+    
     try:
-        boto3.client('sts').get_caller_identity()
+        config = AWSConfig()
+        config.identity()
     except Exception as e:
         print(f"AWS credentials not configured: {e}")
         return 1
     
-    list_services()
+    list_services(config)
     return 0
 
 if __name__ == "__main__":
@@ -4,19 +4,74 @@ Remove Service Script
 Removes service from S3Bridge
 """
 
-import boto3
 import json
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.aws_config import AWSConfig
+from scripts._service_helpers import (
+    THROTTLING_CODES, error_code, get_lambda_env_vars, is_throttling, update_lambda_env
+)
+
+def update_lambda_config(service_name, config=None, env_vars=None):
+    """Drop the service entry from the Lambda environment.
+    
+    Pass env_vars already fetched by the caller to skip a second
+    get_function_configuration round-trip.
+    """
+    return update_lambda_env(config or AWSConfig(), {f'SERVICE_{service_name.upper()}': None}, env_vars)
+
+def remove_iam_role(service_name, config=None):
+    """Delete the service role with its inline and attached policies"""
+    from botocore.exceptions import ClientError
+    config = config or AWSConfig()
+    iam = config.client('iam')
+    role_name = f"{service_name}-s3-access-role"
+    try:
+        # A role must be empty before delete_role succeeds
+        policy_names = [
+            name
+            for page in iam.get_paginator('list_role_policies').paginate(RoleName=role_name)
+            for name in page['PolicyNames']
+        ]
+        attached_arns = [
+            policy['PolicyArn']
+            for page in iam.get_paginator('list_attached_role_policies').paginate(RoleName=role_name)
+            for policy in page['AttachedPolicies']
+        ]
+        
+        # Independent calls on the same role, issue them concurrently
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                executor.submit(iam.delete_role_policy, RoleName=role_name, PolicyName=name)
+                for name in policy_names
+            ] + [
+                executor.submit(iam.detach_role_policy, RoleName=role_name, PolicyArn=arn)
+                for arn in attached_arns
+            ]
+            for future in futures:
+                future.result()
+        
+        # Delete role
+        iam.delete_role(RoleName=role_name)
+        print(f"Removed IAM role: {role_name}")
+        return True
+    except ClientError as e:
+        code = error_code(e)
+        if code in THROTTLING_CODES:
+            raise
+        if code == 'NoSuchEntity':
+            print(f"IAM role {role_name} not found (already deleted)")
+            return True
+        print(f"Failed to remove IAM role: {e}")
+        return False
 
 def remove_service(service_name, force=False):
     """Remove service from S3Bridge"""
-    
     config = AWSConfig()
     
     if not config.is_deployed():
@@ -24,12 +79,8 @@ def remove_service(service_name, force=False):
         return False
     
     try:
-        lambda_client = boto3.client('lambda')
-        iam = boto3.client('iam')
-        
-        # Get current environment variables
-        response = lambda_client.get_function_configuration(FunctionName='s3bridge-credential-service')
-        env_vars = response.get('Environment', {}).get('Variables', {})
+        # Fetch the environment once and reuse it for the update
+        env_vars = get_lambda_env_vars(config)
         
         service_env_key = f'SERVICE_{service_name.upper()}'
         
@@ -45,40 +96,30 @@ def remove_service(service_name, force=False):
                 return False
         
         # Remove from Lambda environment
-        del env_vars[service_env_key]
-        lambda_client.update_function_configuration(
-            FunctionName='s3bridge-credential-service',
-            Environment={'Variables': env_vars}
-        )
+        if not update_lambda_config(service_name, config, env_vars):
+            return False
         print(f"Removed Lambda configuration for service: {service_name}")
         
         # Remove IAM role
-        role_name = f"{service_name}-s3-access-role"
-        try:
-            # Delete role policy first
-            iam.delete_role_policy(
-                RoleName=role_name,
-                PolicyName=f"{service_name}S3AccessPolicy"
-            )
-            # Delete role
-            iam.delete_role(RoleName=role_name)
-            print(f"Removed IAM role: {role_name}")
-        except iam.exceptions.NoSuchEntityException:
-            print(f"IAM role {role_name} not found (already deleted)")
+        if not remove_iam_role(service_name, config):
+            return False
         
         print(f"Service '{service_name}' removed successfully")
         return True
         
     except Exception as e:
+        # Throttling re-raised by the helpers is not a plain failure, let it reach the caller
+        if is_throttling(e):
+            raise
         print(f"Failed to remove service: {e}")
         return False
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Remove service from S3Bridge')
     parser.add_argument('service_name', help='Service name to remove')
     parser.add_argument('--force', action='store_true', help='Skip confirmation')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     success = remove_service(args.service_name, args.force)
     return 0 if success else 1
@@ -5,15 +5,18 @@ Unified command-line interface for S3Bridge service management
 """
 
 import argparse
+import importlib
 import sys
-import subprocess
 from pathlib import Path
 
+# Sibling scripts are imported by module name
+sys.path.insert(0, str(Path(__file__).parent))
+
 def run_script(script_name, args):
-    """Run a management script with arguments"""
-    script_path = Path(__file__).parent / f"{script_name}.py"
-    cmd = [sys.executable, str(script_path)] + args
-    return subprocess.run(cmd).returncode
+    """Run a management script's main() in-process with arguments"""
+    # Importing instead of spawning a new interpreter skips Python startup and the boto3 import
+    module = importlib.import_module(script_name)
+    return module.main(args)
 
 def main():
     parser = argparse.ArgumentParser(
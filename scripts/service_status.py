@@ -4,19 +4,28 @@ Service Status Script
 Shows detailed status and health of S3Bridge services
 """
 
-import boto3
-import json
+import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 
+import requests
+from requests.adapters import HTTPAdapter
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.aws_config import AWSConfig
+from scripts._service_helpers import parse_service_env
+
 
-def check_infrastructure_status():
+# Shared keep-alive session for the endpoint probe and service access checks
+_http = requests.Session()
+_http.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+def check_infrastructure_status(config=None):
     """Check overall infrastructure health"""
-    config = AWSConfig()
+    config = config or AWSConfig()
     status = {
         'cloudformation': False,
         'lambda_function': False,
@@ -24,74 +33,69 @@ def check_infrastructure_status():
         'api_key': False
     }
     
+    # Create the clients on this thread; boto3 client creation is not thread-safe
     try:
-        # Check CloudFormation stack
-        cf = boto3.client('cloudformation')
-        cf.describe_stacks(StackName=config.stack_name)
-        status['cloudformation'] = True
+        cf = config.client('cloudformation')
+        lambda_client = config.client('lambda')
     except Exception:
-        pass
+        return status
     
-    try:
-        # Check Lambda function
-        lambda_client = boto3.client('lambda')
+    def _check_stack():
+        # One describe_stacks covers the stack, API Gateway URL and API key
+        stack = cf.describe_stacks(StackName=config.stack_name)['Stacks'][0]
+        status['cloudformation'] = True
+        
+        outputs = {o['OutputKey']: o['OutputValue'] for o in stack.get('Outputs', [])}
+        status['api_gateway'] = bool(outputs.get('ApiGatewayUrl'))
+        status['api_key'] = bool(outputs.get('ApiKey'))
+    
+    def _check_lambda():
         lambda_client.get_function(FunctionName='s3bridge-credential-service')
         status['lambda_function'] = True
-    except Exception:
-        pass
-    
-    try:
-        # Check API Gateway
-        api_url = config.get_api_gateway_url()
-        if api_url:
-            status['api_gateway'] = True
-    except Exception:
-        pass
     
-    try:
-        # Check API key
-        cf = boto3.client('cloudformation')
-        outputs = cf.describe_stacks(StackName=config.stack_name)['Stacks'][0]['Outputs']
-        api_key = next(o['OutputValue'] for o in outputs if o['OutputKey'] == 'ApiKey')
-        if api_key:
-            status['api_key'] = True
-    except Exception:
-        pass
+    # Probes are independent I/O, run them side by side
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(_check_stack), executor.submit(_check_lambda)]
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass
     
     return status
 
-def get_lambda_metrics():
+def get_lambda_metrics(config=None):
     """Get Lambda function metrics"""
+    config = config or AWSConfig()
     try:
-        cloudwatch = boto3.client('cloudwatch')
+        cloudwatch = config.client('cloudwatch')
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(hours=24)
         
-        # Get invocation count
-        response = cloudwatch.get_metric_statistics(
-            Namespace='AWS/Lambda',
-            MetricName='Invocations',
-            Dimensions=[{'Name': 'FunctionName', 'Value': 's3bridge-credential-service'}],
-            StartTime=start_time,
-            EndTime=end_time,
-            Period=3600,
-            Statistics=['Sum']
-        )
-        
-        total_invocations = sum(point['Sum'] for point in response['Datapoints'])
+        def _query(query_id, metric_name):
+            return {
+                'Id': query_id,
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': 'AWS/Lambda',
+                        'MetricName': metric_name,
+                        'Dimensions': [{'Name': 'FunctionName', 'Value': 's3bridge-credential-service'}]
+                    },
+                    'Period': 3600,
+                    'Stat': 'Sum'
+                }
+            }
         
-        # Get error count
-        response = cloudwatch.get_metric_statistics(
-            Namespace='AWS/Lambda',
-            MetricName='Errors',
-            Dimensions=[{'Name': 'FunctionName', 'Value': 's3bridge-credential-service'}],
+        # Fetch invocations and errors in a single request
+        response = cloudwatch.get_metric_data(
+            MetricDataQueries=[_query('inv', 'Invocations'), _query('err', 'Errors')],
             StartTime=start_time,
-            EndTime=end_time,
-            Period=3600,
-            Statistics=['Sum']
+            EndTime=end_time
         )
         
-        total_errors = sum(point['Sum'] for point in response['Datapoints'])
+        totals = {result['Id']: sum(result['Values']) for result in response['MetricDataResults']}
+        total_invocations = totals.get('inv', 0)
+        total_errors = totals.get('err', 0)
         
         return {
             'invocations_24h': int(total_invocations),
@@ -101,20 +105,20 @@ def get_lambda_metrics():
     except Exception:
         return {'invocations_24h': 0, 'errors_24h': 0, 'success_rate': 0}
 
-def test_service_access(service_name):
+def test_service_access(service_name, http_session=None, config=None):
     """Test if service can get credentials"""
     try:
         from src.universal_auth import S3BridgeAuthProvider
-        auth = S3BridgeAuthProvider(service_name)
-        credentials = auth.get_credentials()
+        auth = S3BridgeAuthProvider(service_name, http_session=http_session, config=config)
+        # Bypass the credential caches so the check exercises the live API
+        credentials = auth.get_credentials(use_cache=False)
         return True
     except Exception as e:
         return str(e)
 
-def show_service_status():
+def show_service_status(config=None):
     """Show comprehensive service status"""
-    
-    config = AWSConfig()
+    config = config or AWSConfig()
     
     print("S3Bridge - System Status")
     print(f"Account: {config.account_id}")
@@ -124,7 +128,7 @@ def show_service_status():
     
     # Infrastructure status
     print("Infrastructure Status:")
-    infra_status = check_infrastructure_status()
+    infra_status = check_infrastructure_status(config)
     
     for component, status in infra_status.items():
         icon = "OK" if status else "FAIL"
@@ -136,7 +140,7 @@ def show_service_status():
     
     # Lambda metrics
     print("Performance Metrics (24h):")
-    metrics = get_lambda_metrics()
+    metrics = get_lambda_metrics(config)
     print(f"   Invocations: {metrics['invocations_24h']}")
     print(f"   Errors: {metrics['errors_24h']}")
     print(f"   Success Rate: {metrics['success_rate']:.1f}%")
@@ -147,33 +151,35 @@ def show_service_status():
     
     try:
         # Get services from Lambda config
-        lambda_client = boto3.client('lambda')
+        lambda_client = config.client('lambda')
         response = lambda_client.get_function_configuration(FunctionName='s3bridge-credential-service')
         env_vars = response.get('Environment', {}).get('Variables', {})
         
-        services = {}
-        for key, value in env_vars.items():
-            if key.startswith('SERVICE_'):
-                service_name = key[8:].lower()
-                try:
-                    services[service_name] = json.loads(value)
-                except json.JSONDecodeError:
-                    continue
-        
-        # Add universal service
-        account_id = env_vars.get('AWS_ACCOUNT_ID')
-        if account_id:
-            services['universal'] = {
-                'role': f"arn:aws:iam::{account_id}:role/service-role/s3bridge-access-role",
-                'buckets': ['*']
-            }
+        services = parse_service_env(env_vars)
         
         if not services:
             print("   No services configured")
         else:
-            for service_name, service_config in services.items():
-                # Test service access
-                access_test = test_service_access(service_name)
+            from src.universal_auth import S3BridgeAuthProvider
+            
+            # Create the CloudFormation client and resolve the API key once on this thread;
+            # boto3 client creation is not thread-safe and every worker would otherwise
+            # miss the key cache at the same moment
+            config.client('cloudformation')
+            try:
+                S3BridgeAuthProvider('universal', http_session=_http, config=config)._get_api_key()
+            except Exception:
+                pass
+            
+            # Test service access concurrently over the pooled HTTP session
+            service_names = sorted(services)
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                access_results = list(executor.map(
+                    lambda name: test_service_access(name, _http, config), service_names
+                ))
+            
+            for service_name, access_test in zip(service_names, access_results):
+                service_config = services[service_name]
                 access_icon = "OK" if access_test is True else "FAIL"
                 
                 print(f"   {access_icon} {service_name}")
@@ -196,8 +202,7 @@ def show_service_status():
             
             # Test API accessibility
             try:
-                import requests
-                response = requests.get(f"{api_url}/credentials?service=test", timeout=5)
+                response = _http.head(f"{api_url}/credentials", params={'service': 'test'}, timeout=5)
                 if response.status_code in [400, 403]:  # Expected for test service
                     print("   API Gateway responding")
                 else:
@@ -207,14 +212,18 @@ def show_service_status():
     except Exception:
         print("API Gateway: Not configured")
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Show S3Bridge system status')
+    parser.parse_args(argv)
+    
     try:
-        boto3.client('sts').get_caller_identity()
+        config = AWSConfig()
+        config.identity()
     except Exception as e:
         print(f"ERROR: AWS credentials not configured: {e}")
         return 1
     
-    show_service_status()
+    show_service_status(config)
     return 0
 
 if __name__ == "__main__":
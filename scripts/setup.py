@@ -4,7 +4,6 @@ S3Bridge Setup Script
 Deploys infrastructure to any AWS account
 """
 
-import boto3
 import json
 import time
 import zipfile
@@ -20,6 +19,7 @@ from config.aws_config import AWSConfig
 
 def find_existing_api_gateway():
     """Find existing API Gateway that uses s3bridge-credential-service"""
+    import boto3
     try:
         api_client = boto3.client('apigateway')
         lambda_client = boto3.client('lambda')
@@ -72,7 +72,7 @@ def create_lambda_zip(lambda_dir, function_name):
     """Create deployment zip for Lambda function"""
     zip_buffer = io.BytesIO()
     
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zip_file:
         lambda_file = lambda_dir / "universal_credential_service.py"
         if lambda_file.exists():
             zip_file.write(lambda_file, "lambda_function.py")
@@ -81,10 +81,11 @@ def create_lambda_zip(lambda_dir, function_name):
     
     return zip_buffer.getvalue()
 
-def deploy_infrastructure(admin_username='admin', force=False):
+def deploy_infrastructure(admin_username='admin', force=False, config=None):
     """Deploy S3Bridge infrastructure"""
+    import boto3
     
-    config = AWSConfig()
+    config = config or AWSConfig()
     
     print(f"🚀 Deploying S3Bridge to account {config.account_id}")
     print(f"📍 Region: {config.region}")
@@ -168,6 +169,7 @@ def deploy_infrastructure(admin_username='admin', force=False):
 
 def get_api_key(config):
     """Get API key from CloudFormation outputs"""
+    import boto3
     try:
         cf = boto3.client('cloudformation')
         outputs = cf.describe_stacks(StackName=config.stack_name)['Stacks'][0]['Outputs']
@@ -204,6 +206,7 @@ def persist_api_key(api_key):
 
 def deploy_lambda_functions(config):
     """Deploy Lambda function code"""
+    import boto3
     
     lambda_client = boto3.client('lambda')
     lambda_dir = Path(__file__).parent.parent / "lambda_functions"
@@ -212,12 +215,12 @@ def deploy_lambda_functions(config):
         's3bridge-credential-service'
     ]
     
+    # All functions ship the same source file, so build the package once
+    zip_content = create_lambda_zip(lambda_dir, functions[0])
+    
     for function_name in functions:
         print(f"📤 Deploying {function_name}...")
         
-        # Create deployment package
-        zip_content = create_lambda_zip(lambda_dir, function_name)
-        
         # Update function code
         try:
             lambda_client.update_function_code(
@@ -241,13 +244,14 @@ def main():
     
     # Check AWS credentials
     try:
-        boto3.client('sts').get_caller_identity()
+        config = AWSConfig()
+        config.identity()
     except Exception as e:
         print(f"❌ AWS credentials not configured: {e}")
         print("💡 Run 'aws configure' to set up credentials")
         return 1
     
-    success = deploy_infrastructure(args.admin_user, args.force)
+    success = deploy_infrastructure(args.admin_user, args.force, config)
     return 0 if success else 1
 
 if __name__ == "__main__":
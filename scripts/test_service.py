@@ -4,24 +4,40 @@ Test Service Script
 Test service functionality and permissions
 """
 
-import boto3
 import json
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 # Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
+_root = str(Path(__file__).parent.parent)
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+@lru_cache(maxsize=None)
+def _session():
+    """Shared boto3 session, created on first use"""
+    import boto3
+    return boto3.session.Session()
+
+@lru_cache(maxsize=None)
+def _sts():
+    """Shared STS client, created on first use"""
+    return _session().client('sts')
 
 def test_service_credentials(service_name):
     """Test if service can obtain credentials"""
     try:
+        # src imports boto3 at module level; keep it off the --help path
         from src.universal_auth import S3BridgeAuthProvider
         
         print(f"Testing credential access for service: {service_name}")
         
         auth = S3BridgeAuthProvider(service_name)
-        credentials = auth.get_credentials()
+        # Bypass the credential caches so the check exercises the live API
+        credentials = auth.get_credentials(use_cache=False)
         
         if credentials and all(k in credentials for k in ['access_key', 'secret_key', 'session_token']):
             print("Credentials obtained successfully")
@@ -48,7 +64,7 @@ def test_s3_operations(service_name, bucket_name, test_key="test/service_test.js
         # Test data
         test_data = {
             "service": service_name,
-            "test_timestamp": str(boto3.Session().region_name),
+            "test_timestamp": str(_session().region_name),
             "test": True
         }
         
@@ -60,25 +76,30 @@ def test_s3_operations(service_name, bucket_name, test_key="test/service_test.js
             return False
         print("   Write successful")
         
-        # Test read
-        print("   Testing read operation...")
-        read_data = client.read_json(test_key)
+        # Test read and list together, both only depend on the write
+        print("   Testing read and list operations...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            read_future = executor.submit(client.read_json, test_key)
+            # Stop listing as soon as the test key shows up
+            list_future = executor.submit(
+                lambda: any(key == test_key for key in client.iter_objects("test/", page_size=100))
+            )
+            read_data = read_future.result()
+            found = list_future.result()
+        
         if not read_data or read_data.get('service') != service_name:
             print("   Read operation failed")
             return False
         print("   Read successful")
         
-        # Test list
-        print("   Testing list operation...")
-        objects = client.list_objects("test/")
-        if test_key not in objects:
+        if not found:
             print("   List operation failed")
             return False
-        print(f"   List successful ({len(objects)} objects found)")
+        print("   List successful")
         
         # Test delete (cleanup)
         print("   Testing delete operation...")
-        delete_success = client.delete_object(test_key)
+        delete_success = client.delete_objects([test_key])
         if not delete_success:
             print("   Delete operation failed")
             return False
@@ -172,7 +193,7 @@ def run_comprehensive_test(service_name, bucket_name):
         print("Service has issues that need attention")
         return False
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Test S3Bridge service')
     parser.add_argument('service_name', help='Service name to test')
     parser.add_argument('bucket_name', help='Bucket name for testing')
@@ -183,11 +204,13 @@ def main():
     parser.add_argument('--validation-only', action='store_true',
                        help='Test only bucket validation')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
-    # Check AWS credentials
+    # Check AWS credentials (boto3 is first imported here, after argument parsing);
+    # on EC2 the instance profile is read from IMDS instead of calling STS
     try:
-        boto3.client('sts').get_caller_identity()
+        from config.aws_config import instance_identity
+        instance_identity() or _sts().get_caller_identity()
     except Exception as e:
         print(f"AWS credentials not configured: {e}")
         return 1
@@ -26,6 +26,9 @@ setup(
         "boto3>=1.26.0",
         "requests>=2.28.0",
     ],
+    extras_require={
+        "fast": ["orjson>=3.9"],
+    },
     entry_points={
         "console_scripts": [
             "s3bridge=scripts.cli:main",
@@ -3,11 +3,16 @@ Universal Authentication Provider
 Account-agnostic API key authentication and credential management
 """
 
+from __future__ import annotations
+
 import os
 import json
-import requests
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+import hashlib
+import tempfile
+import time
+from functools import lru_cache
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Any, Optional
 from pathlib import Path
 import sys
 
@@ -15,36 +20,93 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config.aws_config import AWSConfig
 
+if TYPE_CHECKING:
+    import requests
+
+# orjson is optional; fall back to requests' stdlib json decoding when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Credentials are persisted here so later CLI processes can skip the API call;
+# set S3BRIDGE_CACHE_DIR to an empty string to keep them in memory only
+_cache_dir_env = os.environ.get('S3BRIDGE_CACHE_DIR')
+CACHE_DIR = None if _cache_dir_env == '' else Path(_cache_dir_env or Path.home() / '.s3bridge')
+
+# Seconds before the real expiry at which credentials are refreshed; the credential
+# Lambda's CRED_CACHE_MARGIN must stay larger than this
+CREDENTIAL_REFRESH_MARGIN = 600
+
+@lru_cache(maxsize=None)
+def _default_http_session() -> requests.Session:
+    """Keep-alive session shared by all providers so refreshes reuse TLS connections"""
+    # requests is only imported once credentials actually have to be fetched
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    # 500 is the credential Lambda's handled-error response and is not worth retrying; after
+    # the last retry hand back the response itself so its error body reaches the caller
+    retries = Retry(total=3, backoff_factor=0.1, status_forcelist=[429, 502, 503, 504], raise_on_status=False)
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries))
+    return session
+
 class S3BridgeAuthProvider:
     """S3Bridge authentication provider for AWS credentials via API key"""
     
-    def __init__(self, service_name: str = "default"):
+    # API keys resolved from CloudFormation, keyed by stack name, shared by all providers
+    _API_KEY_CACHE: Dict[str, str] = {}
+    
+    def __init__(self, service_name: str = "default", http_session: Optional[requests.Session] = None,
+                 config: Optional[AWSConfig] = None, session=None):
         """
         Initialize auth provider
         
         Args:
             service_name: Service identifier for credential API
+            http_session: Optional requests session, defaults to a shared pooled session
+            config: Optional AWSConfig to share between providers, defaults to a new one
+            session: Optional boto3 Session for the default AWSConfig's clients
         """
         self.service_name = service_name
+        self._http = http_session
         self._cached_credentials = None
-        self._credentials_expiry = None
-        self._config = AWSConfig()
+        self._credentials_expiry_ts = None
+        self._config = config or AWSConfig(session=session)
+        # Credential endpoint and request parts, resolved on the first fetch
+        self._endpoint = None
+        self._headers = None
+        self._params = None
+        # ETag of the credentials held in memory, for conditional refreshes
+        self._etag = None
         
-    def get_credentials(self) -> Dict[str, Any]:
-        """Get AWS credentials via API key authentication"""
-        if self._cached_credentials and not self.credentials_expired():
-            return self._cached_credentials
+    def get_credentials(self, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Get AWS credentials via API key authentication
+        
+        Args:
+            use_cache: Set False to always call the credential API, e.g. for health checks
+        """
+        if use_cache:
+            if self._cached_credentials and not self.credentials_expired():
+                return self._cached_credentials
             
+            if self._load_cached_credentials():
+                return self._cached_credentials
+        
         return self._fetch_fresh_credentials()
     
     def credentials_expired(self) -> bool:
         """Check if cached credentials are expired"""
-        if not self._credentials_expiry:
-            return True
-        return datetime.now(self._credentials_expiry.tzinfo) >= self._credentials_expiry
+        # Expiry is kept as epoch seconds so this hot-path check is a float compare
+        return self._credentials_expiry_ts is None or time.time() >= self._credentials_expiry_ts
     
-    def _fetch_fresh_credentials(self) -> Dict[str, Any]:
-        """Fetch fresh credentials from API"""
+    def _ensure_endpoint(self):
+        """Resolve the credential endpoint, API key and request parts once per provider"""
+        if self._endpoint:
+            return
         
         # Check if infrastructure is deployed
         if not self._config.is_deployed():
@@ -55,21 +117,28 @@ class S3BridgeAuthProvider:
         if not api_url:
             raise Exception("API Gateway URL not found. Check deployment.")
         
-        endpoint = f"{api_url}/credentials"
-        
-        # Get API key
-        api_key = self._get_api_key()
+        self._headers = {'X-API-Key': self._get_api_key()}
+        self._params = {'service': self.service_name, 'duration': '3600'}
+        self._endpoint = f"{api_url}/credentials"
+    
+    def _fetch_fresh_credentials(self) -> Dict[str, Any]:
+        """Fetch fresh credentials from API"""
+        self._ensure_endpoint()
         
         try:
-            response = requests.get(
-                endpoint,
-                params={'service': self.service_name, 'duration': '3600'},
-                headers={'X-API-Key': api_key},
-                timeout=30
-            )
+            # Still-valid credentials (e.g. a health check bypassing the cache) only need revalidating
+            headers = self._headers
+            if self._etag and self._cached_credentials and not self.credentials_expired():
+                headers = {**self._headers, 'If-None-Match': self._etag}
+            
+            http = self._http or _default_http_session()
+            response = http.get(self._endpoint, params=self._params, headers=headers, timeout=30)
+            
+            if response.status_code == 304:
+                return self._cached_credentials
             
             if response.status_code == 200:
-                creds_data = response.json()
+                creds_data = orjson.loads(response.content) if orjson else response.json()
                 
                 # Cache credentials
                 self._cached_credentials = {
@@ -80,10 +149,14 @@ class S3BridgeAuthProvider:
                 
                 # Set expiry (10 minutes before actual expiry)
                 expiry_time = datetime.fromisoformat(creds_data['Expiration'].replace('Z', '+00:00'))
-                self._credentials_expiry = expiry_time - timedelta(minutes=10)
+                self._credentials_expiry_ts = expiry_time.timestamp() - CREDENTIAL_REFRESH_MARGIN
+                self._etag = response.headers.get('ETag')
+                self._save_cached_credentials()
                 
                 return self._cached_credentials
             else:
+                # Re-resolve the endpoint and key next time in case either changed
+                self._endpoint = None
                 raise Exception(f"Credential service failed with status {response.status_code}: {response.text}")
                 
         except Exception as e:
@@ -97,6 +170,12 @@ class S3BridgeAuthProvider:
         if api_key:
             return api_key
         
+        # Try key already resolved in this process
+        stack_name = self._config.stack_name
+        api_key = self._API_KEY_CACHE.get(stack_name)
+        if api_key:
+            return api_key
+        
         # Try config file
         config = self._config.load_deployment_config()
         if config and 'api_key' in config:
@@ -104,10 +183,10 @@ class S3BridgeAuthProvider:
         
         # Try to get from CloudFormation outputs
         try:
-            import boto3
-            cf = boto3.client('cloudformation')
-            outputs = cf.describe_stacks(StackName=self._config.stack_name)['Stacks'][0]['Outputs']
+            cf = self._config.client('cloudformation')
+            outputs = cf.describe_stacks(StackName=stack_name)['Stacks'][0]['Outputs']
             api_key = next(o['OutputValue'] for o in outputs if o['OutputKey'] == 'ApiKey')
+            self._API_KEY_CACHE[stack_name] = api_key
             
             # Save to config for future use
             if config:
@@ -124,10 +203,69 @@ class S3BridgeAuthProvider:
         
         raise Exception("API key not found. Set S3BRIDGE_API_KEY environment variable or redeploy infrastructure.")
     
+    def _cache_scope(self) -> Dict[str, str]:
+        """Caller credentials, region and stack that cached credentials must belong to"""
+        # A digest of the local access key stands in for the account without an STS call
+        access_key_id = self._config.access_key_id or ''
+        return {
+            'caller': hashlib.sha256(access_key_id.encode()).hexdigest()[:16],
+            'region': self._config.region,
+            'stack_name': self._config.stack_name
+        }
+    
+    def _cache_file(self, scope: Dict[str, str]) -> Path:
+        """Path of the on-disk credential cache for this service and deployment"""
+        return CACHE_DIR / f"creds-{scope['caller']}-{scope['region']}-{scope['stack_name']}-{self.service_name}.json"
+    
+    def _load_cached_credentials(self) -> bool:
+        """Load unexpired credentials persisted by an earlier process for the same deployment"""
+        if CACHE_DIR is None:
+            return False
+        try:
+            scope = self._cache_scope()
+            with open(self._cache_file(scope)) as f:
+                data = json.load(f)
+            expiry = float(data['expiry'])
+            credentials = {key: data[key] for key in ('access_key', 'secret_key', 'session_token')}
+        except Exception:
+            return False
+        
+        # Never hand out credentials issued for other caller credentials or another stack
+        if any(data.get(key) != value for key, value in scope.items()):
+            return False
+        if time.time() >= expiry:
+            return False
+        
+        self._cached_credentials = credentials
+        self._credentials_expiry_ts = expiry
+        return True
+    
+    def _save_cached_credentials(self):
+        """Persist credentials for later processes; failures only cost a future API call"""
+        if CACHE_DIR is None or self.credentials_expired():
+            return
+        try:
+            scope = self._cache_scope()
+            CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # mkstemp creates the file owner-only (0600); the rename makes readers see whole files
+            fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix='.creds-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({**self._cached_credentials, **scope, 'expiry': self._credentials_expiry_ts}, f)
+            os.replace(tmp_path, self._cache_file(scope))
+        except Exception:
+            pass
+    
     def invalidate_credentials(self):
         """Force refresh of cached credentials"""
         self._cached_credentials = None
-        self._credentials_expiry = None
+        self._credentials_expiry_ts = None
+        self._etag = None
+        if CACHE_DIR is None:
+            return
+        try:
+            self._cache_file(self._cache_scope()).unlink()
+        except Exception:
+            pass
     
     def reset_authentication(self):
         """Reset authentication state"""
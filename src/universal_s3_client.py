@@ -5,27 +5,36 @@ Account-agnostic S3 client with automatic credential management
 
 import boto3
 import json
+from botocore.config import Config
 import fnmatch
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 try:
     from .universal_auth import S3BridgeAuthProvider
 except ImportError:
     from universal_auth import S3BridgeAuthProvider
 
+# Note: In modular version, this could be loaded from config
+# For now, using basic validation
+SERVICE_BUCKET_PATTERNS = {
+    'analytics': ('*-analytics-*', 'analytics-*'),
+}
+
 class S3BridgeClient:
     """S3Bridge client with service-based access control"""
     
-    def __init__(self, bucket_name: str, service_name: str):
+    def __init__(self, bucket_name: str, service_name: str, session=None):
         """
         Initialize S3 client for specific service
         
         Args:
             bucket_name: S3 bucket name
             service_name: Service identifier (determines permissions)
+            session: Optional boto3 Session to build clients from, defaults to boto3's default session
         """
         self.bucket_name = bucket_name
         self.service_name = service_name
-        self.auth_provider = S3BridgeAuthProvider(service_name)
+        self._session = session
+        self.auth_provider = S3BridgeAuthProvider(service_name, session=session)
         self._s3_client = None
         
         # Validate bucket access for service
@@ -33,29 +42,29 @@ class S3BridgeClient:
     
     def _validate_bucket_access(self):
         """Validate that service can access this bucket"""
-        # Note: In modular version, this could be loaded from config
-        # For now, using basic validation
-        service_patterns = {
-            'analytics': ['*-analytics-*', 'analytics-*'],
-            'universal': ['*']  # Universal access
-        }
+        # S3Bridge universal service bypasses validation
+        if self.service_name == 'universal':
+            return
         
-        patterns = service_patterns.get(self.service_name, [f"{self.service_name}-*"])
+        patterns = SERVICE_BUCKET_PATTERNS.get(self.service_name, (f"{self.service_name}-*",))
         
-        # Check if bucket matches any allowed pattern
-        if not any(fnmatch.fnmatch(self.bucket_name, pattern) for pattern in patterns):
-            if self.service_name != 'universal':  # S3Bridge universal service bypasses validation
-                raise ValueError(f"Service '{self.service_name}' not authorized for bucket '{self.bucket_name}'")
+        # Check if bucket matches any allowed pattern; bucket names are always
+        # lowercase, so skip fnmatch's OS-dependent case normalisation
+        if not any(fnmatch.fnmatchcase(self.bucket_name, pattern) for pattern in patterns):
+            raise ValueError(f"Service '{self.service_name}' not authorized for bucket '{self.bucket_name}'")
     
     def _get_s3_client(self):
         """Get authenticated S3 client"""
         if not self._s3_client:
             credentials = self.auth_provider.get_credentials()
-            self._s3_client = boto3.client(
+            factory = self._session.client if self._session else boto3.client
+            self._s3_client = factory(
                 's3',
                 aws_access_key_id=credentials['access_key'],
                 aws_secret_access_key=credentials['secret_key'],
-                aws_session_token=credentials['session_token']
+                aws_session_token=credentials['session_token'],
+                # Room for concurrent callers sharing this client
+                config=Config(max_pool_connections=20)
             )
         return self._s3_client
     
@@ -139,20 +148,21 @@ class S3BridgeClient:
         except Exception:
             return False
     
+    def iter_objects(self, prefix: str = "", page_size: int = 1000) -> Iterator[str]:
+        """Yield object keys with prefix, fetching pages only as they are consumed"""
+        self._refresh_client_if_needed()
+        s3 = self._get_s3_client()
+        paginator = s3.get_paginator('list_objects_v2')
+        
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix,
+                                       PaginationConfig={'PageSize': page_size}):
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+    
     def list_objects(self, prefix: str = "") -> List[str]:
         """List objects in bucket with prefix"""
         try:
-            self._refresh_client_if_needed()
-            s3 = self._get_s3_client()
-            
-            objects = []
-            paginator = s3.get_paginator('list_objects_v2')
-            
-            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
-                if 'Contents' in page:
-                    objects.extend([obj['Key'] for obj in page['Contents']])
-            
-            return objects
+            return list(self.iter_objects(prefix))
         except Exception:
             return []
     
@@ -163,5 +173,24 @@ class S3BridgeClient:
             s3 = self._get_s3_client()
             s3.delete_object(Bucket=self.bucket_name, Key=key)
             return True
+        except Exception:
+            return False
+    
+    def delete_objects(self, keys: List[str]) -> bool:
+        """Delete objects from S3 in batches of up to 1000 keys per request"""
+        try:
+            self._refresh_client_if_needed()
+            s3 = self._get_s3_client()
+            
+            success = True
+            for start in range(0, len(keys), 1000):
+                response = s3.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+                )
+                # Quiet mode only reports failures
+                if response.get('Errors'):
+                    success = False
+            return success
         except Exception:
             return False
\ No newline at end of file
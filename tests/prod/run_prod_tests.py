@@ -7,57 +7,80 @@ Runs live integration tests with real AWS resources
 import os
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 # Add project paths
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+# boto3 default session built once by main(); in-process tests reuse it through boto3.client()
+SHARED_SESSION = None
+
+@lru_cache(maxsize=None)
+def _sts():
+    """Shared STS client from a single boto3 session, created on first use"""
+    import boto3
+    return (SHARED_SESSION or boto3.session.Session()).client('sts')
+
 def check_aws_credentials():
     """Check if AWS credentials are configured"""
     try:
-        import boto3
-        sts = boto3.client('sts')
-        identity = sts.get_caller_identity()
+        # On EC2 the instance profile is read from IMDS instead of calling STS
+        from config.aws_config import instance_identity
+        identity = instance_identity() or _sts().get_caller_identity()
         return True, identity
     except Exception as e:
         return False, str(e)
 
-def check_prerequisites():
-    """Check all prerequisites for live testing"""
-    print("Checking prerequisites...")
-    
-    # Check AWS credentials
-    aws_ok, aws_info = check_aws_credentials()
-    if aws_ok:
-        print(f"SUCCESS: AWS credentials configured")
-        print(f"   Account: {aws_info['Account']}")
-        print(f"   User: {aws_info.get('Arn', aws_info['UserId'])}")
-    else:
-        print(f"ERROR: AWS credentials not configured: {aws_info}")
-        return False
-    
+def _check_local_prerequisites(lines):
+    """Check packages and project structure, appending report lines"""
     # Check dependencies
     try:
         import boto3
         import requests
-        print("SUCCESS: Required packages available")
+        lines.append("SUCCESS: Required packages available")
     except ImportError as e:
-        print(f"ERROR: Missing required packages: {e}")
+        lines.append(f"ERROR: Missing required packages: {e}")
         return False
     
     # Check project structure
     required_dirs = ['src', 'scripts', 'config', 'templates']
+    present = {entry.name for entry in os.scandir(project_root) if entry.is_dir()}
     for dir_name in required_dirs:
-        dir_path = project_root / dir_name
-        if dir_path.exists():
-            print(f"SUCCESS: {dir_name}/ directory found")
+        if dir_name in present:
+            lines.append(f"SUCCESS: {dir_name}/ directory found")
         else:
-            print(f"ERROR: {dir_name}/ directory missing")
+            lines.append(f"ERROR: {dir_name}/ directory missing")
             return False
     
     return True
 
+def check_prerequisites():
+    """Check all prerequisites for live testing"""
+    print("Checking prerequisites...")
+    
+    # The STS round-trip runs while the local checks do; their output is buffered to keep the order
+    local_lines = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        aws_future = executor.submit(check_aws_credentials)
+        local_ok = _check_local_prerequisites(local_lines)
+        aws_ok, aws_info = aws_future.result()
+    
+    # Check AWS credentials
+    if aws_ok:
+        print(f"SUCCESS: AWS credentials configured")
+        print(f"   Account: {aws_info['Account']}")
+        print(f"   User: {aws_info.get('Arn', aws_info['UserId'])}")
+    else:
+        print(f"ERROR: AWS credentials not configured: {aws_info}")
+        return False
+    
+    for line in local_lines:
+        print(line)
+    return local_ok
+
 def run_integration_tests():
     """Run live integration tests"""
     try:
@@ -90,6 +113,13 @@ def main():
     
     args = parser.parse_args()
     
+    # Pay the boto3/requests import and session setup cost once, before any test runs
+    global SHARED_SESSION
+    import boto3
+    import requests
+    boto3.setup_default_session()
+    SHARED_SESSION = boto3.DEFAULT_SESSION
+    
     print("S3Bridge - Production Test Runner")
     print("=" * 60)
     print("WARNING: These tests use real AWS resources!")
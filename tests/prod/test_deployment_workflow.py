@@ -9,7 +9,10 @@ import sys
 import json
 import time
 import unittest
+import io
+import importlib
 import subprocess
+from contextlib import redirect_stdout, redirect_stderr
 from pathlib import Path
 
 # Add project paths
@@ -37,9 +40,10 @@ class TestDeploymentWorkflow(unittest.TestCase):
             'test_service.py'
         ]
         
+        # One directory read instead of a stat per script
+        present = {entry.name for entry in os.scandir(project_root / 'scripts')}
         for script_name in scripts:
-            script_path = project_root / 'scripts' / script_name
-            self.assertTrue(script_path.exists(), f"{script_name} not found")
+            self.assertIn(script_name, present, f"{script_name} not found")
             print(f"SUCCESS: {script_name} found")
     
     def test_infrastructure_template_exists(self):
@@ -56,60 +60,75 @@ class TestDeploymentWorkflow(unittest.TestCase):
             print(f"SUCCESS: Template appears valid")
 
 
+def _run_main(module_name, argv):
+    """Run a script's main() in-process, returning a CompletedProcess-style result or the exception"""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    try:
+        module = importlib.import_module(module_name)
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                returncode = module.main(argv) or 0
+            except SystemExit as e:
+                # argparse exits for --help and usage errors
+                returncode = e.code or 0
+    except Exception as e:
+        return e
+    return subprocess.CompletedProcess([module_name, *argv], returncode, stdout.getvalue(), stderr.getvalue())
+
+
 class TestServiceManagementWorkflow(unittest.TestCase):
     """Test service management workflow"""
     
+    # Scripts are called in-process, skipping interpreter startup and the boto3 import per command
+    COMMANDS = {
+        'list': ('list_services', []),
+        'status': ('service_status', []),
+        'add_help': ('add_service', ['--help']),
+    }
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.results = {name: _run_main(module_name, argv)
+                       for name, (module_name, argv) in cls.COMMANDS.items()}
+    
     def test_list_services_command(self):
         """Test list services command"""
-        try:
-            result = subprocess.run([
-                sys.executable, 
-                str(project_root / 'scripts' / 'list_services.py')
-            ], capture_output=True, text=True, timeout=30)
-            
-            print(f"List services exit code: {result.returncode}")
-            if result.stdout:
-                print("Services output:")
-                print(result.stdout)
-            if result.stderr and result.returncode != 0:
-                print("WARNING: Services stderr:")
-                print(result.stderr)
-                
-        except subprocess.TimeoutExpired:
-            print("WARNING: List services command timed out")
-        except Exception as e:
-            print(f"WARNING: List services failed: {e}")
+        result = self.results['list']
+        if isinstance(result, Exception):
+            print(f"WARNING: List services failed: {result}")
+            return
+        
+        print(f"List services exit code: {result.returncode}")
+        if result.stdout:
+            print("Services output:")
+            print(result.stdout)
+        if result.stderr and result.returncode != 0:
+            print("WARNING: Services stderr:")
+            print(result.stderr)
     
     def test_service_status_command(self):
         """Test service status command"""
-        try:
-            result = subprocess.run([
-                sys.executable,
-                str(project_root / 'scripts' / 'service_status.py')
-            ], capture_output=True, text=True, timeout=30)
-            
-            print(f"Service status exit code: {result.returncode}")
-            if result.stdout:
-                print("Status output:")
-                print(result.stdout)
-            if result.stderr and result.returncode != 0:
-                print("WARNING: Status stderr:")
-                print(result.stderr)
-                
-        except subprocess.TimeoutExpired:
-            print("WARNING: Service status command timed out")
-        except Exception as e:
-            print(f"WARNING: Service status failed: {e}")
+        result = self.results['status']
+        if isinstance(result, Exception):
+            print(f"WARNING: Service status failed: {result}")
+            return
+        
+        print(f"Service status exit code: {result.returncode}")
+        if result.stdout:
+            print("Status output:")
+            print(result.stdout)
+        if result.stderr and result.returncode != 0:
+            print("WARNING: Status stderr:")
+            print(result.stderr)
     
     def test_add_service_help(self):
         """Test add service help command"""
+        result = self.results['add_help']
+        if isinstance(result, Exception):
+            print(f"WARNING: Add service help failed: {result}")
+            return
+        
         try:
-            result = subprocess.run([
-                sys.executable,
-                str(project_root / 'scripts' / 'add_service.py'),
-                '--help'
-            ], capture_output=True, text=True, timeout=10)
-            
             self.assertEqual(result.returncode, 0)
             self.assertIn('usage:', result.stdout.lower())
             print(f"SUCCESS: Add service help works")
@@ -189,6 +208,32 @@ def run_workflow_tests():
     print("S3Bridge - Deployment Workflow Tests")
     print("=" * 60)
     
+    # Spread the test classes across workers when pytest-xdist is installed
+    try:
+        import pytest
+        import xdist  # noqa: F401
+    except ImportError:
+        pytest = None
+    
+    if pytest:
+        # loadclass keeps each class on one worker so each setUpClass runs only once;
+        # -rA replays each test's captured output, which is most of what these tests report
+        success = pytest.main(['-n', 'auto', '--dist', 'loadclass', '-rA', '-v', str(Path(__file__))]) == 0
+    else:
+        success = _run_serial()
+    
+    print("\n" + "=" * 60)
+    if success:
+        print("SUCCESS: All workflow tests completed successfully!")
+    else:
+        print("WARNING: Some workflow tests had issues")
+        print("   This may be expected if infrastructure is not deployed")
+    
+    return success
+
+
+def _run_serial():
+    """Run the workflow test classes one after another with unittest"""
     # Create test suite
     loader = unittest.TestLoader()
     suite = unittest.TestSuite()
@@ -202,14 +247,6 @@ def run_workflow_tests():
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
-    
-    print("\n" + "=" * 60)
-    if result.wasSuccessful():
-        print("SUCCESS: All workflow tests completed successfully!")
-    else:
-        print("WARNING: Some workflow tests had issues")
-        print("   This may be expected if infrastructure is not deployed")
-    
     return result.wasSuccessful()
 
 
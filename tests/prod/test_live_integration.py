@@ -7,27 +7,59 @@ Tests real AWS functionality with actual resources
 import os
 import sys
 import json
-import time
+import uuid
+import hashlib
 import unittest
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 
 # Add project paths
 project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-sys.path.insert(0, str(project_root / 'src'))
-sys.path.insert(0, str(project_root / 'config'))
+for path in (project_root, project_root / 'src', project_root / 'config'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+@lru_cache(maxsize=None)
+def _session():
+    """One boto3 session for every test, so endpoint models are loaded once"""
+    import boto3
+    return boto3.session.Session()
+
+@lru_cache(maxsize=None)
+def _config():
+    """Shared AWSConfig, so account_id costs one STS call for the whole run"""
+    from config.aws_config import AWSConfig
+    return AWSConfig(session=_session())
+
+def _client(service_name):
+    """Shared client for a service, with AWSConfig's pooled, adaptive-retry settings"""
+    return _config().client(service_name)
+
+@lru_cache(maxsize=None)
+def _identity():
+    """Caller identity, fetched from STS once per run"""
+    return _client('sts').get_caller_identity()
+
+def setUpModule():
+    """Skip the whole module up front when no AWS credentials are configured,
+    instead of letting every test wait out botocore's retries"""
+    if _session().get_credentials() is None:
+        raise unittest.SkipTest("AWS credentials not configured")
 
 class TestLiveAWSConfig(unittest.TestCase):
     """Test live AWS configuration"""
     
+    @classmethod
+    def setUpClass(cls):
+        cls._cfg = _config()
+    
     def test_aws_credentials(self):
         """Test AWS credentials are configured"""
-        import boto3
         try:
-            sts = boto3.client('sts')
-            identity = sts.get_caller_identity()
+            identity = _identity()
             self.assertIn('Account', identity)
             self.assertIn('UserId', identity)
             print(f"SUCCESS: AWS Account: {identity['Account']}")
@@ -37,9 +69,7 @@ class TestLiveAWSConfig(unittest.TestCase):
     
     def test_aws_config_class(self):
         """Test AWSConfig with real AWS account"""
-        from config.aws_config import AWSConfig
-        
-        config = AWSConfig()
+        config = self._cfg
         
         # Test account ID retrieval
         account_id = config.account_id
@@ -64,9 +94,7 @@ class TestLiveInfrastructureStatus(unittest.TestCase):
     
     def test_deployment_status(self):
         """Test checking if infrastructure is deployed"""
-        from config.aws_config import AWSConfig
-        
-        config = AWSConfig()
+        config = _config()
         is_deployed = config.is_deployed()
         
         print(f"Infrastructure deployed: {is_deployed}")
@@ -109,10 +137,10 @@ class TestLiveS3Operations(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         """Set up test bucket"""
-        import boto3
-        cls.s3_client = boto3.client('s3')
-        cls.test_bucket = f"universal-s3-test-{int(time.time())}"
-        cls.test_region = boto3.Session().region_name or 'us-east-1'
+        cls.s3_client = _client('s3')
+        # Random suffix so parallel workers and back-to-back runs never collide
+        cls.test_bucket = f"universal-s3-test-{uuid.uuid4().hex[:12]}"
+        cls.test_region = _session().region_name or 'us-east-1'
         
         try:
             if cls.test_region == 'us-east-1':
@@ -124,8 +152,11 @@ class TestLiveS3Operations(unittest.TestCase):
                 )
             print(f"SUCCESS: Created test bucket: {cls.test_bucket}")
             
-            # Wait for bucket to be available
-            time.sleep(2)
+            # Wait for bucket to be available; returns as soon as HEAD succeeds
+            cls.s3_client.get_waiter('bucket_exists').wait(
+                Bucket=cls.test_bucket,
+                WaiterConfig={'Delay': 1, 'MaxAttempts': 10}
+            )
             
         except Exception as e:
             print(f"ERROR: Failed to create test bucket: {e}")
@@ -136,21 +167,39 @@ class TestLiveS3Operations(unittest.TestCase):
         """Clean up test bucket"""
         if cls.test_bucket:
             try:
-                # Delete all objects first
-                response = cls.s3_client.list_objects_v2(Bucket=cls.test_bucket)
-                if 'Contents' in response:
-                    objects = [{'Key': obj['Key']} for obj in response['Contents']]
-                    cls.s3_client.delete_objects(
-                        Bucket=cls.test_bucket,
-                        Delete={'Objects': objects}
-                    )
+                # Delete all objects first, 1000 keys per request (the S3 limit)
+                paginator = cls.s3_client.get_paginator('list_objects_v2')
+                objects = []
+                for page in paginator.paginate(Bucket=cls.test_bucket):
+                    for obj in page.get('Contents', []):
+                        objects.append({'Key': obj['Key']})
+                        if len(objects) == 1000:
+                            cls._delete_batch(objects)
+                            objects = []
+                if objects:
+                    cls._delete_batch(objects)
                 
                 # Delete bucket
                 cls.s3_client.delete_bucket(Bucket=cls.test_bucket)
+                cls.s3_client.get_waiter('bucket_not_exists').wait(
+                    Bucket=cls.test_bucket,
+                    WaiterConfig={'Delay': 1, 'MaxAttempts': 10}
+                )
                 print(f"SUCCESS: Cleaned up test bucket: {cls.test_bucket}")
             except Exception as e:
                 print(f"WARNING: Failed to clean up bucket: {e}")
     
+    @classmethod
+    def _delete_batch(cls, objects):
+        """Delete up to 1000 keys in one request"""
+        # Quiet mode only reports the keys that failed
+        response = cls.s3_client.delete_objects(
+            Bucket=cls.test_bucket,
+            Delete={'Objects': objects, 'Quiet': True}
+        )
+        for error in response.get('Errors', []):
+            print(f"WARNING: Failed to delete {error['Key']}: {error.get('Code')}")
+    
     def test_s3_client_with_universal_service(self):
         """Test S3 client with universal service (no auth required)"""
         if not self.test_bucket:
@@ -160,7 +209,7 @@ class TestLiveS3Operations(unittest.TestCase):
         
         # This should work without authentication for universal service
         try:
-            client = S3BridgeClient(self.test_bucket, "universal")
+            client = S3BridgeClient(self.test_bucket, "universal", session=_session())
             self.assertEqual(client.bucket_name, self.test_bucket)
             self.assertEqual(client.service_name, "universal")
             print(f"SUCCESS: S3 Client initialized for bucket: {self.test_bucket}")
@@ -179,26 +228,33 @@ class TestLiveS3Operations(unittest.TestCase):
             "bucket": self.test_bucket
         }
         
+        body = json.dumps(test_data).encode('utf-8')
+        
         try:
-            # Test write
-            self.s3_client.put_object(
+            # Test write; a single-part SSE-S3 upload's ETag is the MD5 of the body
+            put_response = self.s3_client.put_object(
                 Bucket=self.test_bucket,
                 Key=test_key,
-                Body=json.dumps(test_data),
+                Body=body,
                 ContentType='application/json'
             )
+            self.assertEqual(put_response['ETag'].strip('"'), hashlib.md5(body).hexdigest())
             print(f"SUCCESS: Wrote test object: {test_key}")
             
+            # Read and list are independent once the write has landed, so overlap them
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                get_future = pool.submit(self.s3_client.get_object, Bucket=self.test_bucket, Key=test_key)
+                list_future = pool.submit(self.s3_client.list_objects_v2, Bucket=self.test_bucket, Prefix="test/")
+                get_response, list_response = get_future.result(), list_future.result()
+            
             # Test read
-            response = self.s3_client.get_object(Bucket=self.test_bucket, Key=test_key)
-            content = json.loads(response['Body'].read().decode('utf-8'))
+            content = json.load(get_response['Body'])
             self.assertEqual(content['test'], 'live_integration')
             print(f"SUCCESS: Read test object successfully")
             
             # Test list
-            response = self.s3_client.list_objects_v2(Bucket=self.test_bucket, Prefix="test/")
-            self.assertIn('Contents', response)
-            self.assertTrue(any(obj['Key'] == test_key for obj in response['Contents']))
+            keys = {obj['Key'] for obj in list_response.get('Contents', ())}
+            self.assertIn(test_key, keys)
             print(f"SUCCESS: Listed objects successfully")
             
             # Test delete
@@ -238,11 +294,14 @@ class TestLiveServiceManagement(unittest.TestCase):
 class TestLiveAuthentication(unittest.TestCase):
     """Test authentication with real infrastructure"""
     
+    @classmethod
+    def setUpClass(cls):
+        from src.universal_auth import S3BridgeAuthProvider
+        cls.auth = S3BridgeAuthProvider("test-service", config=_config())
+    
     def test_auth_provider_initialization(self):
         """Test auth provider with real config"""
-        from src.universal_auth import S3BridgeAuthProvider
-        
-        auth = S3BridgeAuthProvider("test-service")
+        auth = self.auth
         self.assertEqual(auth.service_name, "test-service")
         print(f"SUCCESS: Auth provider initialized for: test-service")
         
@@ -253,9 +312,7 @@ class TestLiveAuthentication(unittest.TestCase):
     
     def test_api_key_retrieval_methods(self):
         """Test different API key retrieval methods"""
-        from src.universal_auth import S3BridgeAuthProvider
-        
-        auth = S3BridgeAuthProvider("test-service")
+        auth = self.auth
         
         # Test environment variable method
         if 'S3BRIDGE_API_KEY' in os.environ:
@@ -281,28 +338,38 @@ def run_live_tests():
     print("S3Bridge - Live Integration Tests")
     print("=" * 60)
     
-    # Create test suite
-    loader = unittest.TestLoader()
-    suite = unittest.TestSuite()
+    # The classes are independent and mostly wait on AWS, so overlap them
+    # across workers when pytest-xdist is installed
+    try:
+        import pytest
+        import xdist  # noqa: F401
+    except ImportError:
+        pytest = None
     
-    # Add test classes
-    suite.addTests(loader.loadTestsFromTestCase(TestLiveAWSConfig))
-    suite.addTests(loader.loadTestsFromTestCase(TestLiveInfrastructureStatus))
-    suite.addTests(loader.loadTestsFromTestCase(TestLiveS3Operations))
-    suite.addTests(loader.loadTestsFromTestCase(TestLiveServiceManagement))
-    suite.addTests(loader.loadTestsFromTestCase(TestLiveAuthentication))
-    
-    # Run tests
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
+    if pytest:
+        # loadclass keeps each class on one worker so the test bucket is created once
+        success = pytest.main(['-n', 'auto', '--dist', 'loadclass', '-rA', '-v', str(Path(__file__))]) == 0
+    else:
+        success = _run_serial()
     
     print("\n" + "=" * 60)
-    if result.wasSuccessful():
+    if success:
         print("SUCCESS: All live tests completed successfully!")
     else:
         print("WARNING: Some tests failed or had issues (may be expected)")
         print("   Check output above for details")
     
+    return success
+
+
+def _run_serial():
+    """Run the live test classes one after another with unittest"""
+    # Every TestCase in this module, in one pass
+    suite = unittest.defaultTestLoader.loadTestsFromModule(sys.modules[__name__])
+    
+    # Run tests
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
     return result.wasSuccessful()
 
 
@@ -7,28 +7,27 @@ Handles imports and provides comprehensive test execution
 import os
 import sys
 import unittest
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
 
 # Add project paths to sys.path
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-sys.path.insert(0, str(project_root / 'src'))
-sys.path.insert(0, str(project_root / 'scripts'))
-sys.path.insert(0, str(project_root / 'config'))
+for path in (project_root, project_root / 'src', project_root / 'scripts', project_root / 'config'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
 
-def check_dependencies():
-    """Check if required dependencies are available"""
-    missing_deps = []
-    
+@lru_cache(maxsize=None)
+def _module_available(name):
+    """Locate a module without executing it; the tests import it for real later"""
     try:
-        import boto3
+        return find_spec(name) is not None
     except ImportError:
-        missing_deps.append('boto3')
-    
-    try:
-        import requests
-    except ImportError:
-        missing_deps.append('requests')
+        return False
+
+def check_dependencies():
+    """Check if required dependencies are available"""
+    missing_deps = [name for name in ('boto3', 'requests') if not _module_available(name)]
     
     if missing_deps:
         print(f"WARNING: Missing dependencies: {', '.join(missing_deps)}")
@@ -42,31 +41,23 @@ def check_modules():
     modules_status = {}
     
     # Core modules
-    try:
-        from src import universal_auth, universal_s3_client
-        modules_status['core'] = True
-    except ImportError as e:
-        modules_status['core'] = False
-        print(f"WARNING: Core modules issue: {e}")
+    modules_status['core'] = all(
+        _module_available(name) for name in ('src.universal_auth', 'src.universal_s3_client')
+    )
+    if not modules_status['core']:
+        print("WARNING: Core modules issue: src.universal_auth or src.universal_s3_client not found")
     
     # Config module
-    try:
-        from config import aws_config
-        modules_status['config'] = True
-    except ImportError as e:
-        modules_status['config'] = False
-        print(f"WARNING: Config module issue: {e}")
+    modules_status['config'] = _module_available('config.aws_config')
+    if not modules_status['config']:
+        print("WARNING: Config module issue: config.aws_config not found")
     
     # Script modules (optional)
     script_modules = ['add_service', 'list_services', 'remove_service', 'edit_service', 'service_status', 'test_service']
     modules_status['scripts'] = {}
     
     for module in script_modules:
-        try:
-            __import__(module)
-            modules_status['scripts'][module] = True
-        except ImportError:
-            modules_status['scripts'][module] = False
+        modules_status['scripts'][module] = _module_available(module)
     
     return modules_status
 
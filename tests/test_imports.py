@@ -8,9 +8,9 @@ from pathlib import Path
 
 # Add src and scripts to path
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root / 'src'))
-sys.path.insert(0, str(project_root / 'scripts'))
-sys.path.insert(0, str(project_root))
+for path in (project_root / 'src', project_root / 'scripts', project_root):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
 
 def test_imports():
     """Test that all modules can be imported"""
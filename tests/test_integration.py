@@ -6,33 +6,49 @@ Tests operations against mock AWS services
 import os
 import sys
 import json
+import tempfile
 import unittest
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
 
 # Add src and scripts to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
-sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+project_root = Path(__file__).parent.parent
+for path in (project_root / 'src', project_root / 'scripts'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+# The scripts only create boto3 clients inside their functions, so importing
+# them once here is safe under the per-test boto3.client patches
+import add_service
+import backup_restore
+import edit_service
+import list_services
+import remove_service
+import service_manager
+import service_status
+import test_service
+
+# Canned SERVICE_* environment value, serialized once
+TEST_SERVICE_JSON = json.dumps({'role': 'test-role-arn', 'buckets': ['test-*']})
 
 class TestServiceManagerIntegration(unittest.TestCase):
     """Integration tests for service manager"""
     
-    @patch('subprocess.run')
-    def test_service_manager_commands(self, mock_run):
+    @patch('add_service.main', return_value=0)
+    @patch('list_services.main', return_value=0)
+    def test_service_manager_commands(self, mock_list_main, mock_add_main):
         """Test service manager CLI commands"""
-        mock_run.return_value.returncode = 0
-        
-        import service_manager
         
         # Test list command
         result = service_manager.run_script('list_services', [])
         self.assertEqual(result, 0)
+        mock_list_main.assert_called_once_with([])
         
         # Test add command
-        result = service_manager.run_script('add_service', ['test', 'test-*', '--permissions', 'read-write'])
+        add_args = ['test', 'test-*', '--permissions', 'read-write']
+        result = service_manager.run_script('add_service', add_args)
         self.assertEqual(result, 0)
-        
-        mock_run.assert_called()
+        mock_add_main.assert_called_once_with(add_args)
 
 class TestEndToEndWorkflow(unittest.TestCase):
     """End-to-end workflow tests"""
@@ -53,13 +69,14 @@ class TestEndToEndWorkflow(unittest.TestCase):
         mock_cf = Mock()
         
         mock_apigateway = Mock()
-        mock_boto3.side_effect = lambda service: {
+        clients = {
             'iam': mock_iam,
             'lambda': mock_lambda,
             'sts': mock_sts,
             'cloudformation': mock_cf,
             'apigateway': mock_apigateway
-        }[service]
+        }
+        mock_boto3.side_effect = lambda service, **kwargs: clients[service]
         
         # Setup mocks
         mock_sts.get_caller_identity.return_value = {'Account': '123456789012'}
@@ -72,8 +89,7 @@ class TestEndToEndWorkflow(unittest.TestCase):
         }
         
         # 1. Add service
-        import add_service as add_service_module
-        add_result = add_service_module.add_service(self.test_service, self.test_patterns, 'read-write')
+        add_result = add_service.add_service(self.test_service, self.test_patterns, 'read-write')
         self.assertTrue(add_result)
         
         # 2. List services (verify it exists)
@@ -91,21 +107,18 @@ class TestEndToEndWorkflow(unittest.TestCase):
             }
         }
         
-        import list_services
         services = list_services.get_service_config()
         self.assertIn(self.test_service, services)
         
         # 3. Edit service
-        import edit_service as edit_service_module
         new_patterns = ["integration-*", "new-pattern-*"]
-        edit_result = edit_service_module.edit_service(self.test_service, new_patterns, 'read-only')
+        edit_result = edit_service.edit_service(self.test_service, new_patterns, 'read-only')
         self.assertTrue(edit_result)
         
         # 4. Remove service
         mock_iam.list_role_policies.return_value = {'PolicyNames': ['TestPolicy']}
         
-        import remove_service as remove_service_module
-        remove_result = remove_service_module.remove_service(self.test_service, force=True)
+        remove_result = remove_service.remove_service(self.test_service, force=True)
         self.assertTrue(remove_result)
 
 class TestErrorHandling(unittest.TestCase):
@@ -116,10 +129,8 @@ class TestErrorHandling(unittest.TestCase):
         """Test handling of AWS credential errors"""
         mock_boto3.side_effect = Exception("Credentials not configured")
         
-        import add_service as add_service_module
-        
         # Should handle AWS errors gracefully
-        result = add_service_module.add_service("test", ["test-*"], "read-write")
+        result = add_service.add_service("test", ["test-*"], "read-write")
         self.assertFalse(result)
     
     @patch('boto3.client')
@@ -133,8 +144,6 @@ class TestErrorHandling(unittest.TestCase):
             'Environment': {'Variables': {}}
         }
         
-        import edit_service
-        
         config = edit_service.get_current_service_config("nonexistent-service")
         self.assertIsNone(config)
     
@@ -157,26 +166,24 @@ class TestBackupRestoreIntegration(unittest.TestCase):
         
         mock_sts = Mock()
         mock_sts.get_caller_identity.return_value = {'Account': '123456789012'}
-        mock_boto3.side_effect = lambda service: {
+        clients = {
             'lambda': mock_lambda,
             'iam': mock_iam,
             'sts': mock_sts
-        }[service]
+        }
+        mock_boto3.side_effect = lambda service, **kwargs: clients[service]
         
         # Mock existing services
         mock_lambda.get_function_configuration.return_value = {
             'Environment': {
                 'Variables': {
-                    'SERVICE_TEST': json.dumps({
-                        'role': 'test-role-arn',
-                        'buckets': ['test-*']
-                    }),
+                    'SERVICE_TEST': TEST_SERVICE_JSON,
                     'AWS_ACCOUNT_ID': '123456789012'
                 }
             }
         }
         
-        mock_iam.list_roles.return_value = {
+        mock_iam.get_paginator.return_value.paginate.return_value = [{
             'Roles': [{
                 'RoleName': 'test-s3-access-role',
                 'Arn': 'test-role-arn',
@@ -184,21 +191,15 @@ class TestBackupRestoreIntegration(unittest.TestCase):
                 'AssumeRolePolicyDocument': {},
                 'Description': 'Test role'
             }]
-        }
+        }]
         
-        mock_iam.list_role_policies.return_value = {'PolicyNames': ['TestPolicy']}
-        mock_iam.get_role_policy.return_value = {
-            'PolicyDocument': {'Version': '2012-10-17', 'Statement': []}
-        }
-        
-        import backup_restore
-        import tempfile
+        # Policy fetching is covered by TestMockBackupRestore; skip it here
+        mock_iam.list_role_policies.return_value = {'PolicyNames': []}
         
         # Test backup
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            backup_file = f.name
-        
-        try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            backup_file = os.path.join(temp_dir, 'backup.json')
+            
             backup_result = backup_restore.backup_services(backup_file)
             self.assertTrue(backup_result)
             
@@ -214,10 +215,6 @@ class TestBackupRestoreIntegration(unittest.TestCase):
             # Test restore (dry run)
             restore_result = backup_restore.restore_services(backup_file, dry_run=True)
             self.assertTrue(restore_result)
-            
-        finally:
-            if os.path.exists(backup_file):
-                os.unlink(backup_file)
 
 class TestPerformanceMonitoring(unittest.TestCase):
     """Test performance monitoring functionality"""
@@ -231,12 +228,13 @@ class TestPerformanceMonitoring(unittest.TestCase):
         
         mock_sts = Mock()
         mock_sts.get_caller_identity.return_value = {'Account': '123456789012'}
-        mock_boto3.side_effect = lambda service: {
+        clients = {
             'cloudformation': mock_cf,
             'lambda': mock_lambda,
             'cloudwatch': mock_cloudwatch,
             'sts': mock_sts
-        }[service]
+        }
+        mock_boto3.side_effect = lambda service, **kwargs: clients[service]
         
         # Mock healthy infrastructure
         mock_cf.describe_stacks.return_value = {
@@ -249,15 +247,13 @@ class TestPerformanceMonitoring(unittest.TestCase):
         mock_lambda.get_function.return_value = {'Configuration': {}}
         
         # Mock metrics
-        mock_cloudwatch.get_metric_statistics.return_value = {
-            'Datapoints': [
-                {'Sum': 100},  # Invocations
-                {'Sum': 5}     # Errors
+        mock_cloudwatch.get_metric_data.return_value = {
+            'MetricDataResults': [
+                {'Id': 'inv', 'Values': [100]},  # Invocations
+                {'Id': 'err', 'Values': [5]}     # Errors
             ]
         }
         
-        import service_status
-        
         # Test infrastructure status
         status = service_status.check_infrastructure_status()
         self.assertTrue(status['cloudformation'])
@@ -291,12 +287,10 @@ class TestServiceTesting(unittest.TestCase):
         mock_s3_instance = Mock()
         mock_s3_instance.write_json.return_value = True
         mock_s3_instance.read_json.return_value = {'service': 'test', 'test': True}
-        mock_s3_instance.list_objects.return_value = ['test/service_test.json']
-        mock_s3_instance.delete_object.return_value = True
+        mock_s3_instance.iter_objects.return_value = iter(['test/service_test.json'])
+        mock_s3_instance.delete_objects.return_value = True
         mock_s3_client.return_value = mock_s3_instance
         
-        import test_service
-        
         result = test_service.run_comprehensive_test('test-service', 'test-bucket')
         self.assertTrue(result)
 
@@ -314,7 +308,8 @@ def run_integration_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestPerformanceMonitoring))
     suite.addTests(loader.loadTestsFromTestCase(TestServiceTesting))
     
-    runner = unittest.TextTestRunner(verbosity=2)
+    # Print dots and replay captured output only for tests that fail
+    runner = unittest.TextTestRunner(verbosity=1, buffer=True)
     result = runner.run(suite)
     
     return result.wasSuccessful()
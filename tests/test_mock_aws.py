@@ -6,17 +6,50 @@ Tests operations using mock AWS services for safe testing
 import os
 import sys
 import json
+import tempfile
 import unittest
 from unittest.mock import Mock, patch, MagicMock, call
 from pathlib import Path
+from datetime import datetime, timedelta
 
 # Add src and scripts to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
-sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+project_root = Path(__file__).parent.parent
+for path in (project_root / 'src', project_root / 'scripts', project_root):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+# The scripts only create boto3 clients inside their functions, so importing
+# them once here is safe under the per-test boto3.client patches
+import add_service
+import backup_restore
+import edit_service
+import list_services
+import remove_service
+import service_status
+import test_service
+from config.aws_config import AWSConfig
+
+# Canned SERVICE_* environment values, serialized once
+TEST1_SERVICE_JSON = json.dumps({
+    'role': 'arn:aws:iam::123456789012:role/service-role/test1-s3-access-role',
+    'buckets': ['test1-*']
+})
+TEST2_SERVICE_JSON = json.dumps({
+    'role': 'arn:aws:iam::123456789012:role/service-role/test2-s3-access-role',
+    'buckets': ['test2-*', 'shared-*']
+})
+TEST_SERVICE_JSON = json.dumps({'role': 'test-role-arn', 'buckets': ['test-*']})
 
 class MockAWSTestCase(unittest.TestCase):
     """Base class for mock AWS tests"""
     
+    CLIENT_NAMES = ('sts', 'iam', 'lambda', 'cloudformation', 'cloudwatch', 'apigateway')
+    
+    @classmethod
+    def setUpClass(cls):
+        """Build the mock clients once; each test resets them"""
+        cls._mock_clients = {name: Mock() for name in cls.CLIENT_NAMES}
+    
     def setUp(self):
         """Set up mock AWS environment"""
         self.mock_account_id = '123456789012'
@@ -29,15 +62,10 @@ class MockAWSTestCase(unittest.TestCase):
         self.mock_role_arn = f'arn:aws:iam::{self.mock_account_id}:role/service-role/{self.test_service}-s3-access-role'
         
     def create_mock_clients(self):
-        """Create mock AWS clients"""
-        mock_clients = {
-            'sts': Mock(),
-            'iam': Mock(),
-            'lambda': Mock(),
-            'cloudformation': Mock(),
-            'cloudwatch': Mock(),
-            'apigateway': Mock()
-        }
+        """Reset the class's mock AWS clients and apply the common responses"""
+        mock_clients = self._mock_clients
+        for client in mock_clients.values():
+            client.reset_mock(return_value=True, side_effect=True)
         
         # Setup common responses
         mock_clients['sts'].get_caller_identity.return_value = self.mock_sts_response
@@ -51,19 +79,21 @@ class MockAWSTestCase(unittest.TestCase):
 class TestMockAddService(MockAWSTestCase):
     """Test add_service with mock AWS"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build one AWSConfig over the class's mock clients"""
+        super().setUpClass()
+        with patch('boto3.client', side_effect=lambda service, **kwargs: cls._mock_clients[service]):
+            cls._config = AWSConfig()
+    
     @patch('boto3.client')
     def test_add_service_success(self, mock_boto3):
         """Test successful service addition"""
         mock_clients = self.create_mock_clients()
-        mock_boto3.side_effect = lambda service: mock_clients[service]
-        
-        import add_service
-        from config.aws_config import AWSConfig
-        
-        config = AWSConfig()
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
         
         # Test IAM role creation
-        role_arn = add_service.create_service_role(self.test_service, self.test_bucket_patterns, 'read-write', config)
+        role_arn = add_service.create_service_role(self.test_service, self.test_bucket_patterns, 'read-write', self._config)
         
         self.assertEqual(role_arn, self.mock_role_arn)
         mock_clients['iam'].create_role.assert_called_once()
@@ -80,13 +110,9 @@ class TestMockAddService(MockAWSTestCase):
             {'Error': {'Code': 'EntityAlreadyExists'}}, 'CreateRole'
         )
         
-        mock_boto3.side_effect = lambda service: mock_clients[service]
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
         
-        import add_service
-        from config.aws_config import AWSConfig
-        
-        config = AWSConfig()
-        role_arn = add_service.create_service_role(self.test_service, self.test_bucket_patterns, 'read-write', config)
+        role_arn = add_service.create_service_role(self.test_service, self.test_bucket_patterns, 'read-write', self._config)
         
         # Should still return role ARN and update policy
         self.assertEqual(role_arn, self.mock_role_arn)
@@ -105,14 +131,8 @@ class TestMockListServices(MockAWSTestCase):
             'Configuration': {
                 'Environment': {
                     'Variables': {
-                        'SERVICE_TEST1': json.dumps({
-                            'role': 'arn:aws:iam::123456789012:role/service-role/test1-s3-access-role',
-                            'buckets': ['test1-*']
-                        }),
-                        'SERVICE_TEST2': json.dumps({
-                            'role': 'arn:aws:iam::123456789012:role/service-role/test2-s3-access-role',
-                            'buckets': ['test2-*', 'shared-*']
-                        }),
+                        'SERVICE_TEST1': TEST1_SERVICE_JSON,
+                        'SERVICE_TEST2': TEST2_SERVICE_JSON,
                         'AWS_ACCOUNT_ID': self.mock_account_id
                     }
                 }
@@ -120,26 +140,24 @@ class TestMockListServices(MockAWSTestCase):
         }
         
         # Mock IAM roles
-        mock_clients['iam'].list_roles.return_value = {
+        mock_clients['iam'].get_paginator.return_value.paginate.return_value = [{
             'Roles': [
                 {
                     'RoleName': 'test1-s3-access-role',
                     'Arn': 'arn:aws:iam::123456789012:role/service-role/test1-s3-access-role',
-                    'CreateDate': '2024-01-01T00:00:00Z',
+                    'CreateDate': datetime(2024, 1, 1),
                     'Description': 'Test service 1'
                 },
                 {
                     'RoleName': 'test2-s3-access-role',
                     'Arn': 'arn:aws:iam::123456789012:role/service-role/test2-s3-access-role',
-                    'CreateDate': '2024-01-02T00:00:00Z',
+                    'CreateDate': datetime(2024, 1, 2),
                     'Description': 'Test service 2'
                 }
             ]
-        }
+        }]
         
-        mock_boto3.side_effect = lambda service: mock_clients[service]
-        
-        import list_services
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
         
         services = list_services.get_service_config()
         roles = list_services.get_service_roles()
@@ -176,19 +194,26 @@ class TestMockRemoveService(MockAWSTestCase):
         }
         
         # Mock IAM role with policies
-        mock_clients['iam'].list_role_policies.return_value = {
-            'PolicyNames': ['TestServiceS3AccessPolicy']
+        paginators = {
+            'list_role_policies': Mock(),
+            'list_attached_role_policies': Mock()
         }
+        paginators['list_role_policies'].paginate.return_value = [{
+            'PolicyNames': ['TestServiceS3AccessPolicy']
+        }]
+        paginators['list_attached_role_policies'].paginate.return_value = [{
+            'AttachedPolicies': [{'PolicyArn': 'arn:aws:iam::aws:policy/ReadOnlyAccess'}]
+        }]
+        mock_clients['iam'].get_paginator.side_effect = lambda name: paginators[name]
         
-        mock_boto3.side_effect = lambda service: mock_clients[service]
-        
-        import remove_service
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
         
         # Test IAM role removal
         iam_result = remove_service.remove_iam_role(self.test_service)
         self.assertTrue(iam_result)
         
         mock_clients['iam'].delete_role_policy.assert_called_once()
+        mock_clients['iam'].detach_role_policy.assert_called_once()
         mock_clients['iam'].delete_role.assert_called_once()
         
         # Test Lambda config update
@@ -203,6 +228,33 @@ class TestMockRemoveService(MockAWSTestCase):
         self.assertNotIn(f'SERVICE_{self.test_service.upper()}', updated_env)
         self.assertIn('OTHER_VAR', updated_env)
 
+    @patch('boto3.client')
+    def test_remove_service_client_errors(self, mock_boto3):
+        """Test missing roles are tolerated and throttling is surfaced"""
+        from botocore.exceptions import ClientError
+        mock_clients = self.create_mock_clients()
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
+        
+        # Missing role counts as already removed
+        mock_clients['iam'].get_paginator.return_value.paginate.side_effect = ClientError(
+            {'Error': {'Code': 'NoSuchEntity', 'Message': 'Role not found'}}, 'ListRolePolicies'
+        )
+        self.assertTrue(remove_service.remove_iam_role(self.test_service))
+        
+        # Throttling is not swallowed
+        mock_clients['lambda'].update_function_configuration.side_effect = ClientError(
+            {'Error': {'Code': 'TooManyRequestsException', 'Message': 'Rate exceeded'}}, 'UpdateFunctionConfiguration'
+        )
+        with self.assertRaises(ClientError):
+            remove_service.update_lambda_config(self.test_service)
+        
+        # ...including through the command itself
+        mock_clients['lambda'].get_function_configuration.return_value = {
+            'Environment': {'Variables': {f'SERVICE_{self.test_service.upper()}': '{}'}}
+        }
+        with self.assertRaises(ClientError):
+            remove_service.remove_service(self.test_service, force=True)
+
 class TestMockEditService(MockAWSTestCase):
     """Test edit_service with mock AWS"""
     
@@ -225,9 +277,18 @@ class TestMockEditService(MockAWSTestCase):
             }
         }
         
-        mock_boto3.side_effect = lambda service: mock_clients[service]
+        mock_clients['iam'].get_role_policy.return_value = {
+            'PolicyDocument': {
+                'Version': '2012-10-17',
+                'Statement': [{
+                    'Effect': 'Allow',
+                    'Action': ['s3:GetObject', 's3:ListBucket'],
+                    'Resource': ['arn:aws:s3:::old-pattern-*', 'arn:aws:s3:::old-pattern-*/*']
+                }]
+            }
+        }
         
-        import edit_service
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
         
         # Test getting current config
         current_config = edit_service.get_current_service_config(self.test_service)
@@ -245,6 +306,29 @@ class TestMockEditService(MockAWSTestCase):
         self.assertTrue(lambda_result)
         
         mock_clients['lambda'].update_function_configuration.assert_called_once()
+    
+    @patch('boto3.client')
+    def test_edit_service_unchanged_policy(self, mock_boto3):
+        """Test that an identical IAM policy is not rewritten"""
+        mock_clients = self.create_mock_clients()
+        
+        mock_clients['iam'].get_role_policy.return_value = {
+            'PolicyDocument': {
+                'Version': '2012-10-17',
+                'Statement': [{
+                    'Effect': 'Allow',
+                    'Action': ['s3:GetObject', 's3:ListBucket'],
+                    'Resource': ['arn:aws:s3:::mock-test-*', 'arn:aws:s3:::mock-test-*/*']
+                }]
+            }
+        }
+        
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
+        
+        iam_result = edit_service.update_iam_role_policy(self.test_service, self.test_bucket_patterns, 'read-only')
+        self.assertTrue(iam_result)
+        
+        mock_clients['iam'].put_role_policy.assert_not_called()
 
 class TestMockServiceStatus(MockAWSTestCase):
     """Test service_status with mock AWS"""
@@ -266,9 +350,7 @@ class TestMockServiceStatus(MockAWSTestCase):
         
         mock_clients['lambda'].get_function.return_value = {'Configuration': {}}
         
-        mock_boto3.side_effect = lambda service: mock_clients[service]
-        
-        import service_status
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
         
         status = service_status.check_infrastructure_status()
         
@@ -283,22 +365,23 @@ class TestMockServiceStatus(MockAWSTestCase):
         mock_clients = self.create_mock_clients()
         
         # Mock CloudWatch metrics
-        mock_clients['cloudwatch'].get_metric_statistics.side_effect = [
-            # Invocations
-            {'Datapoints': [{'Sum': 150}, {'Sum': 200}]},
-            # Errors  
-            {'Datapoints': [{'Sum': 5}, {'Sum': 10}]}
-        ]
-        
-        mock_boto3.side_effect = lambda service: mock_clients[service]
+        mock_clients['cloudwatch'].get_metric_data.return_value = {
+            'MetricDataResults': [
+                # Invocations
+                {'Id': 'inv', 'Values': [150, 200]},
+                # Errors
+                {'Id': 'err', 'Values': [5, 10]}
+            ]
+        }
         
-        import service_status
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
         
         metrics = service_status.get_lambda_metrics()
         
         self.assertEqual(metrics['invocations_24h'], 350)
         self.assertEqual(metrics['errors_24h'], 15)
         self.assertAlmostEqual(metrics['success_rate'], 95.7, places=1)
+        mock_clients['cloudwatch'].get_metric_data.assert_called_once()
 
 class TestMockBackupRestore(MockAWSTestCase):
     """Test backup_restore with mock AWS"""
@@ -312,17 +395,14 @@ class TestMockBackupRestore(MockAWSTestCase):
         mock_clients['lambda'].get_function_configuration.return_value = {
             'Environment': {
                 'Variables': {
-                    'SERVICE_TEST': json.dumps({
-                        'role': 'test-role-arn',
-                        'buckets': ['test-*']
-                    }),
+                    'SERVICE_TEST': TEST_SERVICE_JSON,
                     'AWS_ACCOUNT_ID': self.mock_account_id
                 }
             }
         }
         
         # Mock IAM roles
-        mock_clients['iam'].list_roles.return_value = {
+        mock_clients['iam'].get_paginator.return_value.paginate.return_value = [{
             'Roles': [{
                 'RoleName': 'test-s3-access-role',
                 'Arn': 'test-role-arn',
@@ -330,22 +410,18 @@ class TestMockBackupRestore(MockAWSTestCase):
                 'AssumeRolePolicyDocument': {'Version': '2012-10-17'},
                 'Description': 'Test role'
             }]
-        }
+        }]
         
         mock_clients['iam'].list_role_policies.return_value = {'PolicyNames': ['TestPolicy']}
         mock_clients['iam'].get_role_policy.return_value = {
             'PolicyDocument': {'Version': '2012-10-17', 'Statement': []}
         }
         
-        mock_boto3.side_effect = lambda service: mock_clients[service]
-        
-        import backup_restore
-        import tempfile
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            backup_file = f.name
+        mock_boto3.side_effect = lambda service, **kwargs: mock_clients[service]
         
-        try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            backup_file = os.path.join(temp_dir, 'backup.json')
+            
             result = backup_restore.backup_services(backup_file)
             self.assertTrue(result)
             
@@ -356,11 +432,8 @@ class TestMockBackupRestore(MockAWSTestCase):
             self.assertIn('services', backup_data)
             self.assertIn('iam_roles', backup_data)
             self.assertIn('test', backup_data['services'])
+            self.assertIn('test', backup_data['iam_roles'])
             self.assertEqual(backup_data['account_id'], self.mock_account_id)
-            
-        finally:
-            if os.path.exists(backup_file):
-                os.unlink(backup_file)
 
 class TestMockServiceTesting(MockAWSTestCase):
     """Test service testing with mocks"""
@@ -377,8 +450,6 @@ class TestMockServiceTesting(MockAWSTestCase):
         }
         mock_auth_provider.return_value = mock_auth_instance
         
-        import test_service
-        
         result = test_service.test_service_credentials(self.test_service)
         self.assertTrue(result)
         
@@ -396,23 +467,110 @@ class TestMockServiceTesting(MockAWSTestCase):
             'test_timestamp': 'us-east-1',
             'test': True
         }
-        mock_s3_instance.list_objects.return_value = ['test/service_test.json']
-        mock_s3_instance.delete_object.return_value = True
+        mock_s3_instance.iter_objects.return_value = iter(['test/service_test.json'])
+        mock_s3_instance.delete_objects.return_value = True
         
         mock_s3_client.return_value = mock_s3_instance
         
-        import test_service
-        
         result = test_service.test_s3_operations(self.test_service, 'test-bucket')
         self.assertTrue(result)
         
         # Verify all operations were called
         mock_s3_instance.write_json.assert_called_once()
         mock_s3_instance.read_json.assert_called_once()
-        mock_s3_instance.list_objects.assert_called_once()
-        mock_s3_instance.delete_object.assert_called_once()
+        mock_s3_instance.iter_objects.assert_called_once()
+        mock_s3_instance.delete_objects.assert_called_once()
 
 
+class TestMockCredentialService(MockAWSTestCase):
+    """Test the credential Lambda handler with a mock STS client"""
+    
+    def setUp(self):
+        """Load a fresh copy of the handler module so its caches start empty"""
+        super().setUp()
+        import importlib.util
+        from datetime import timezone
+        
+        handler_path = Path(__file__).parent.parent / 'lambda_functions' / 'universal_credential_service.py'
+        spec = importlib.util.spec_from_file_location('universal_credential_service', handler_path)
+        self.handler = importlib.util.module_from_spec(spec)
+        
+        service_env = {
+            'AWS_ACCOUNT_ID': self.mock_account_id,
+            f'SERVICE_{self.test_service.upper()}': json.dumps({'role': self.mock_role_arn, 'buckets': ['*']})
+        }
+        with patch('boto3.client'), patch.dict(os.environ, service_env):
+            spec.loader.exec_module(self.handler)
+        
+        self.sts = Mock()
+        self.expiration = datetime.now(timezone.utc) + timedelta(hours=1)
+        self.sts.assume_role.side_effect = lambda **kwargs: {'Credentials': {
+            'AccessKeyId': 'AKIA123',
+            'SecretAccessKey': 'secret123',
+            'SessionToken': 'token123',
+            'Expiration': self.expiration
+        }}
+        self.handler.STS_CLIENT = self.sts
+    
+    def invoke(self, service, duration=None):
+        """Call the handler the way API Gateway does"""
+        params = {'service': service}
+        if duration is not None:
+            params['duration'] = duration
+        return self.handler.lambda_handler({'queryStringParameters': params}, None)
+    
+    def test_repeat_request_reuses_credentials(self):
+        """Test a second request is served from the container cache"""
+        first = self.invoke(self.test_service)
+        second = self.invoke(self.test_service)
+        
+        self.assertEqual(first['statusCode'], 200)
+        self.assertEqual(first['body'], second['body'])
+        self.sts.assume_role.assert_called_once()
+    
+    def test_duration_is_clamped_and_keyed(self):
+        """Test duration is capped at an hour and separate durations are cached separately"""
+        self.invoke(self.test_service, '7200')
+        self.assertEqual(self.sts.assume_role.call_args.kwargs['DurationSeconds'], 3600)
+        
+        # 7200 clamps to the same key as 3600
+        self.invoke(self.test_service, '3600')
+        self.assertEqual(self.sts.assume_role.call_count, 1)
+        
+        self.invoke(self.test_service, '1800')
+        self.assertEqual(self.sts.assume_role.call_count, 2)
+        self.assertEqual(self.sts.assume_role.call_args.kwargs['DurationSeconds'], 1800)
+    
+    def test_near_expiry_credentials_are_refetched(self):
+        """Test cached credentials inside the margin are replaced"""
+        from datetime import timezone
+        self.expiration = datetime.now(timezone.utc) + self.handler.CRED_CACHE_MARGIN - timedelta(seconds=1)
+        self.invoke(self.test_service)
+        self.invoke(self.test_service)
+        
+        self.assertEqual(self.sts.assume_role.call_count, 2)
+    
+    def test_conditional_request(self):
+        """Test a client presenting the current ETag gets a bodyless 304"""
+        first = self.invoke(self.test_service)
+        etag = first['headers']['ETag']
+        
+        response = self.handler.lambda_handler({
+            'queryStringParameters': {'service': self.test_service},
+            'headers': {'If-None-Match': etag}
+        }, None)
+        
+        self.assertEqual(response['statusCode'], 304)
+        self.assertNotIn('body', response)
+    
+    def test_unknown_service(self):
+        """Test an unregistered service is rejected without calling STS"""
+        response = self.invoke('not-registered')
+        
+        self.assertEqual(response['statusCode'], 400)
+        self.assertIn('Unknown service', json.loads(response['body'])['error'])
+        self.sts.assume_role.assert_not_called()
+
 def run_mock_tests():
     """Run all mock AWS tests"""
     loader = unittest.TestLoader()
@@ -426,8 +584,10 @@ def run_mock_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestMockServiceStatus))
     suite.addTests(loader.loadTestsFromTestCase(TestMockBackupRestore))
     suite.addTests(loader.loadTestsFromTestCase(TestMockServiceTesting))
+    suite.addTests(loader.loadTestsFromTestCase(TestMockCredentialService))
     
-    runner = unittest.TextTestRunner(verbosity=2)
+    # Print dots and replay captured output only for tests that fail
+    runner = unittest.TextTestRunner(verbosity=1, buffer=True)
     result = runner.run(suite)
     
     return result.wasSuccessful()
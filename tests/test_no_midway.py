@@ -5,9 +5,12 @@ Test Universal S3 Client without Midway dependency
 import os
 import sys
 from pathlib import Path
+from unittest.mock import patch
 
 # Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+src_dir = str(Path(__file__).parent.parent / 'src')
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
 
 def test_auth_provider_initialization():
     """Test that auth provider can be initialized without Midway"""
@@ -17,7 +20,6 @@ def test_auth_provider_initialization():
     auth = S3BridgeAuthProvider("test-service")
     assert auth.service_name == "test-service"
     assert auth._cached_credentials is None
-    print("[PASS] Auth provider initializes correctly")
 
 def test_s3_client_initialization():
     """Test that S3 client can be initialized without Midway"""
@@ -28,41 +30,22 @@ def test_s3_client_initialization():
         client = S3BridgeClient("test-bucket", "test-service")
         assert client.bucket_name == "test-bucket"
         assert client.service_name == "test-service"
-        print("[PASS] S3 client initializes correctly")
     except ValueError as e:
         # Expected for bucket validation
-        if "not authorized" in str(e):
-            print("[PASS] S3 client bucket validation works correctly")
-        else:
+        if "not authorized" not in str(e):
             raise
 
 def test_api_key_environment():
     """Test API key environment variable handling"""
     from src.universal_auth import S3BridgeAuthProvider
     
-    # Set test API key
-    os.environ['S3BRIDGE_API_KEY'] = 'test-key-123'
-    
-    auth = S3BridgeAuthProvider("test-service")
-    
-    try:
-        # This will fail because infrastructure isn't deployed, but should get past API key check
-        auth._get_api_key()
-        print("[PASS] API key environment variable handling works")
-    except Exception as e:
-        if "test-key-123" in str(e) or "API key not found" not in str(e):
-            print("[PASS] API key environment variable handling works")
-        else:
-            raise
-    finally:
-        # Clean up
-        del os.environ['S3BRIDGE_API_KEY']
-
-if __name__ == "__main__":
-    print("Testing S3Bridge without Midway...")
-    
-    test_auth_provider_initialization()
-    test_s3_client_initialization()
-    test_api_key_environment()
-    
-    print("All tests passed! Midway dependency successfully removed.")
\ No newline at end of file
+    # Set test API key; patch.dict restores the environment even if the test fails
+    with patch.dict(os.environ, {'S3BRIDGE_API_KEY': 'test-key-123'}):
+        auth = S3BridgeAuthProvider("test-service")
+        
+        try:
+            # This will fail because infrastructure isn't deployed, but should get past API key check
+            auth._get_api_key()
+        except Exception as e:
+            if "test-key-123" not in str(e) and "API key not found" in str(e):
+                raise
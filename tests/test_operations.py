@@ -3,20 +3,41 @@ Test Suite for S3Bridge Operations
 Tests all service management operations
 """
 
+import io
 import os
 import sys
 import json
+import importlib
 import tempfile
 import unittest
+from functools import lru_cache
 from unittest.mock import Mock, patch, MagicMock, mock_open
 from pathlib import Path
 
 # Add src, scripts, and config to path
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root / 'src'))
-sys.path.insert(0, str(project_root / 'scripts'))
-sys.path.insert(0, str(project_root / 'config'))
-sys.path.insert(0, str(project_root))
+for path in (project_root / 'src', project_root / 'scripts', project_root / 'config', project_root):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+@lru_cache(maxsize=None)
+def _try_import(name):
+    """Import a project module once, or None when it cannot be imported"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+def _import_or_skip(name):
+    """Module for a test, skipping the test when it is unavailable"""
+    module = _try_import(name)
+    if module is None:
+        raise unittest.SkipTest(f"{name.rsplit('.', 1)[-1]} module not available")
+    return module
+
+# Canned responses that no test modifies, built once at module load
+TEST_SERVICE_JSON = json.dumps({'role': 'test-role-arn', 'buckets': ['test-*']})
+LIST_PAGES = ({'Contents': [{'Key': 'test/file1.json'}, {'Key': 'test/file2.json'}]},)
 
 class TestServiceOperations(unittest.TestCase):
     """Test service management operations"""
@@ -27,14 +48,13 @@ class TestServiceOperations(unittest.TestCase):
         self.test_bucket_patterns = ["test-*", "app-test-*"]
         self.test_permissions = "read-write"
         
-    def test_add_service_function_exists(self):
-        """Test that add_service function exists and is callable"""
-        try:
-            import add_service as add_service_module
-            self.assertTrue(hasattr(add_service_module, 'add_service'))
-            self.assertTrue(callable(add_service_module.add_service))
-        except ImportError:
-            self.skipTest("add_service module not available")
+    def test_service_functions_exist(self):
+        """Test that the add/remove/edit service functions exist and are callable"""
+        for name in ('add_service', 'remove_service', 'edit_service'):
+            with self.subTest(module=name):
+                module = _import_or_skip(name)
+                self.assertTrue(hasattr(module, name))
+                self.assertTrue(callable(getattr(module, name)))
     
     @patch('boto3.client')
     def test_list_services(self, mock_boto3):
@@ -45,7 +65,7 @@ class TestServiceOperations(unittest.TestCase):
         mock_sts = Mock()
         mock_sts.get_caller_identity.return_value = {'Account': '123456789012'}
         
-        mock_boto3.side_effect = lambda service: {
+        mock_boto3.side_effect = lambda service, **kwargs: {
             'lambda': mock_lambda,
             'iam': mock_iam,
             'sts': mock_sts
@@ -56,10 +76,7 @@ class TestServiceOperations(unittest.TestCase):
             'Configuration': {
                 'Environment': {
                     'Variables': {
-                        'SERVICE_TEST': json.dumps({
-                            'role': 'test-role-arn',
-                            'buckets': ['test-*']
-                        }),
+                        'SERVICE_TEST': TEST_SERVICE_JSON,
                         'AWS_ACCOUNT_ID': '123456789012'
                     }
                 }
@@ -69,19 +86,16 @@ class TestServiceOperations(unittest.TestCase):
         from datetime import datetime
         
         # Mock IAM response
-        mock_iam.list_roles.return_value = {
+        mock_iam.get_paginator.return_value.paginate.return_value = [{
             'Roles': [{
                 'RoleName': 'test-s3-access-role',
                 'Arn': 'test-role-arn',
                 'CreateDate': datetime(2024, 1, 1),
                 'Description': 'Test role'
             }]
-        }
+        }]
         
-        try:
-            import list_services
-        except ImportError:
-            self.skipTest("list_services module not available")
+        list_services = _import_or_skip('list_services')
         
         services = list_services.get_service_config()
         roles = list_services.get_service_roles()
@@ -90,24 +104,6 @@ class TestServiceOperations(unittest.TestCase):
         self.assertIn('test', roles)
         self.assertEqual(services['test']['buckets'], ['test-*'])
     
-    def test_remove_service_function_exists(self):
-        """Test that remove_service function exists and is callable"""
-        try:
-            import remove_service as remove_service_module
-            self.assertTrue(hasattr(remove_service_module, 'remove_service'))
-            self.assertTrue(callable(remove_service_module.remove_service))
-        except ImportError:
-            self.skipTest("remove_service module not available")
-    
-    def test_edit_service_function_exists(self):
-        """Test that edit_service function exists and is callable"""
-        try:
-            import edit_service as edit_service_module
-            self.assertTrue(hasattr(edit_service_module, 'edit_service'))
-            self.assertTrue(callable(edit_service_module.edit_service))
-        except ImportError:
-            self.skipTest("edit_service module not available")
-    
     @patch('boto3.client')
     def test_service_status(self, mock_boto3):
         """Test service_status operation"""
@@ -118,7 +114,7 @@ class TestServiceOperations(unittest.TestCase):
         mock_sts = Mock()
         mock_sts.get_caller_identity.return_value = {'Account': '123456789012'}
         
-        mock_boto3.side_effect = lambda service: {
+        mock_boto3.side_effect = lambda service, **kwargs: {
             'cloudformation': mock_cf,
             'lambda': mock_lambda,
             'cloudwatch': mock_cloudwatch,
@@ -134,14 +130,14 @@ class TestServiceOperations(unittest.TestCase):
         mock_lambda.get_function.return_value = {'Configuration': {}}
         
         # Mock CloudWatch metrics
-        mock_cloudwatch.get_metric_statistics.return_value = {
-            'Datapoints': [{'Sum': 100}]
+        mock_cloudwatch.get_metric_data.return_value = {
+            'MetricDataResults': [
+                {'Id': 'inv', 'Values': [100]},
+                {'Id': 'err', 'Values': [0]}
+            ]
         }
         
-        try:
-            import service_status
-        except ImportError:
-            self.skipTest("service_status module not available")
+        service_status = _import_or_skip('service_status')
         
         infra_status = service_status.check_infrastructure_status()
         metrics = service_status.get_lambda_metrics()
@@ -174,22 +170,15 @@ class TestServiceOperations(unittest.TestCase):
             }
         }
         
-        # Test backup file creation and loading
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump(test_backup, f)
-            backup_file = f.name
+        # Test backup serialization and loading
+        buffer = io.StringIO()
+        json.dump(test_backup, buffer)
+        buffer.seek(0)
+        loaded_backup = json.load(buffer)
         
-        try:
-            # Test loading backup
-            with open(backup_file, 'r') as f:
-                loaded_backup = json.load(f)
-            
-            self.assertEqual(loaded_backup['account_id'], '123456789012')
-            self.assertIn('test', loaded_backup['services'])
-            self.assertIn('test', loaded_backup['iam_roles'])
-            
-        finally:
-            os.unlink(backup_file)
+        self.assertEqual(loaded_backup['account_id'], '123456789012')
+        self.assertIn('test', loaded_backup['services'])
+        self.assertIn('test', loaded_backup['iam_roles'])
     
     @patch('boto3.client')
     def test_test_service(self, mock_boto3):
@@ -204,10 +193,7 @@ class TestServiceOperations(unittest.TestCase):
             }
             mock_auth.return_value = mock_auth_instance
             
-            try:
-                import test_service as test_service_module
-            except ImportError:
-                self.skipTest("test_service module not available")
+            test_service_module = _import_or_skip('test_service')
             
             result = test_service_module.test_service_credentials(self.test_service)
             self.assertTrue(result)
@@ -217,14 +203,11 @@ class TestServiceOperations(unittest.TestCase):
             mock_s3_instance = Mock()
             mock_s3_instance.write_json.return_value = True
             mock_s3_instance.read_json.return_value = {'service': self.test_service, 'test': True}
-            mock_s3_instance.list_objects.return_value = ['test/service_test.json']
-            mock_s3_instance.delete_object.return_value = True
+            mock_s3_instance.iter_objects.return_value = iter(['test/service_test.json'])
+            mock_s3_instance.delete_objects.return_value = True
             mock_s3.return_value = mock_s3_instance
             
-            try:
-                import test_service as test_service_module
-            except ImportError:
-                self.skipTest("test_service module not available")
+            test_service_module = _import_or_skip('test_service')
             
             result = test_service_module.test_s3_operations(self.test_service, "test-bucket")
             self.assertTrue(result)
@@ -239,10 +222,7 @@ class TestAuthProvider(unittest.TestCase):
     
     def test_auth_provider_init(self):
         """Test auth provider initialization"""
-        try:
-            from src.universal_auth import S3BridgeAuthProvider
-        except ImportError:
-            self.skipTest("universal_auth module not available")
+        S3BridgeAuthProvider = _import_or_skip('src.universal_auth').S3BridgeAuthProvider
         
         auth = S3BridgeAuthProvider(self.service_name)
         self.assertEqual(auth.service_name, self.service_name)
@@ -251,10 +231,7 @@ class TestAuthProvider(unittest.TestCase):
     @patch.dict(os.environ, {'S3BRIDGE_API_KEY': 'test-key-123'})
     def test_api_key_from_env(self):
         """Test API key retrieval from environment"""
-        try:
-            from src.universal_auth import S3BridgeAuthProvider
-        except ImportError:
-            self.skipTest("universal_auth module not available")
+        S3BridgeAuthProvider = _import_or_skip('src.universal_auth').S3BridgeAuthProvider
         
         auth = S3BridgeAuthProvider(self.service_name)
         
@@ -266,13 +243,10 @@ class TestAuthProvider(unittest.TestCase):
             api_key = auth._get_api_key()
             self.assertEqual(api_key, 'test-key-123')
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_credentials_success(self, mock_get):
         """Test successful credential retrieval"""
-        try:
-            from src.universal_auth import S3BridgeAuthProvider
-        except ImportError:
-            self.skipTest("universal_auth module not available")
+        S3BridgeAuthProvider = _import_or_skip('src.universal_auth').S3BridgeAuthProvider
         from datetime import datetime, timezone
         
         # Mock successful API response
@@ -284,6 +258,7 @@ class TestAuthProvider(unittest.TestCase):
             'SessionToken': 'token123',
             'Expiration': '2024-12-31T23:59:59Z'
         }
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_get.return_value = mock_response
         
         auth = S3BridgeAuthProvider(self.service_name)
@@ -301,11 +276,8 @@ class TestAuthProvider(unittest.TestCase):
     
     def test_credentials_caching(self):
         """Test credential caching behavior"""
-        try:
-            from src.universal_auth import S3BridgeAuthProvider
-        except ImportError:
-            self.skipTest("universal_auth module not available")
-        from datetime import datetime, timezone, timedelta
+        S3BridgeAuthProvider = _import_or_skip('src.universal_auth').S3BridgeAuthProvider
+        now = 1_700_000_000.0
         
         auth = S3BridgeAuthProvider(self.service_name)
         
@@ -315,18 +287,97 @@ class TestAuthProvider(unittest.TestCase):
             'secret_key': 'secret123',
             'session_token': 'token123'
         }
-        auth._credentials_expiry = datetime.now(timezone.utc) + timedelta(hours=1)
+        auth._credentials_expiry_ts = now + 3600
         
-        # Should return cached credentials without API call
-        credentials = auth.get_credentials()
-        self.assertEqual(credentials['access_key'], 'AKIA123')
+        # Freeze the clock so the expiry checks are exact
+        with patch('time.time', return_value=now):
+            # Should return cached credentials without API call
+            credentials = auth.get_credentials()
+            self.assertEqual(credentials['access_key'], 'AKIA123')
+            
+            # Test expiry check
+            self.assertFalse(auth.credentials_expired())
         
-        # Test expiry check
-        self.assertFalse(auth.credentials_expired())
+        with patch('time.time', return_value=now + 3600):
+            self.assertTrue(auth.credentials_expired())
         
         # Test invalidation
         auth.invalidate_credentials()
         self.assertIsNone(auth._cached_credentials)
+    
+    def test_conditional_refresh(self):
+        """Test a 304 from the credential API keeps the credentials held in memory"""
+        S3BridgeAuthProvider = _import_or_skip('src.universal_auth').S3BridgeAuthProvider
+        import time
+        
+        http = Mock()
+        http.get.return_value = Mock(status_code=304)
+        auth = S3BridgeAuthProvider(self.service_name, http_session=http, config=Mock())
+        auth._cached_credentials = {
+            'access_key': 'AKIA123',
+            'secret_key': 'secret123',
+            'session_token': 'token123'
+        }
+        auth._credentials_expiry_ts = time.time() + 3600
+        auth._etag = '"abc"'
+        
+        with patch.object(auth, '_get_api_key', return_value='test-key'):
+            credentials = auth.get_credentials(use_cache=False)
+        
+        self.assertEqual(credentials['access_key'], 'AKIA123')
+        self.assertEqual(http.get.call_args.kwargs['headers']['If-None-Match'], '"abc"')
+    
+    def test_credentials_disk_cache(self):
+        """Test credentials persisted by one provider are reused by the next"""
+        S3BridgeAuthProvider = _import_or_skip('src.universal_auth').S3BridgeAuthProvider
+        import time
+        
+        config = Mock(access_key_id='AKIAEXAMPLE1', region='us-east-1', stack_name='s3bridge')
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                patch('src.universal_auth.CACHE_DIR', Path(cache_dir)):
+            auth = S3BridgeAuthProvider(self.service_name, config=config)
+            auth._cached_credentials = {
+                'access_key': 'AKIA123',
+                'secret_key': 'secret123',
+                'session_token': 'token123'
+            }
+            auth._credentials_expiry_ts = time.time() + 3600
+            auth._save_cached_credentials()
+            
+            # A provider using other AWS credentials ignores the persisted copy
+            other_config = Mock(access_key_id='AKIAEXAMPLE2', region='us-east-1', stack_name='s3bridge')
+            other_auth = S3BridgeAuthProvider(self.service_name, config=other_config)
+            self.assertFalse(other_auth._load_cached_credentials())
+            
+            # A new provider loads from disk without calling the API
+            fresh_auth = S3BridgeAuthProvider(self.service_name, config=config)
+            with patch.object(fresh_auth, '_fetch_fresh_credentials') as mock_fetch:
+                credentials = fresh_auth.get_credentials()
+                mock_fetch.assert_not_called()
+            self.assertEqual(credentials['access_key'], 'AKIA123')
+            
+            # Invalidation removes the persisted copy
+            fresh_auth.invalidate_credentials()
+            self.assertEqual(list(Path(cache_dir).glob('creds-*.json')), [])
+    
+    def test_credentials_disk_cache_disabled(self):
+        """Test an empty cache directory setting keeps credentials in memory only"""
+        S3BridgeAuthProvider = _import_or_skip('src.universal_auth').S3BridgeAuthProvider
+        import time
+        
+        config = Mock(access_key_id='AKIAEXAMPLE1', region='us-east-1', stack_name='s3bridge')
+        with patch('src.universal_auth.CACHE_DIR', None):
+            auth = S3BridgeAuthProvider(self.service_name, config=config)
+            auth._cached_credentials = {
+                'access_key': 'AKIA123',
+                'secret_key': 'secret123',
+                'session_token': 'token123'
+            }
+            auth._credentials_expiry_ts = time.time() + 3600
+            auth._save_cached_credentials()
+            
+            fresh_auth = S3BridgeAuthProvider(self.service_name, config=config)
+            self.assertFalse(fresh_auth._load_cached_credentials())
 
 
 class TestS3Client(unittest.TestCase):
@@ -334,10 +385,7 @@ class TestS3Client(unittest.TestCase):
     
     def test_s3_client_init(self):
         """Test S3 client initialization"""
-        try:
-            from src.universal_s3_client import S3BridgeClient
-        except ImportError:
-            self.skipTest("universal_s3_client module not available")
+        S3BridgeClient = _import_or_skip('src.universal_s3_client').S3BridgeClient
         
         # Test with universal service (should allow any bucket)
         client = S3BridgeClient("any-bucket", "universal")
@@ -346,10 +394,7 @@ class TestS3Client(unittest.TestCase):
     
     def test_bucket_validation(self):
         """Test bucket access validation"""
-        try:
-            from src.universal_s3_client import S3BridgeClient
-        except ImportError:
-            self.skipTest("universal_s3_client module not available")
+        S3BridgeClient = _import_or_skip('src.universal_s3_client').S3BridgeClient
         
         # Test invalid bucket for analytics service
         with self.assertRaises(ValueError):
@@ -367,10 +412,7 @@ class TestS3Client(unittest.TestCase):
     @patch('boto3.client')
     def test_s3_operations(self, mock_boto3):
         """Test S3 operations with mocked client"""
-        try:
-            from src.universal_s3_client import S3BridgeClient
-        except ImportError:
-            self.skipTest("universal_s3_client module not available")
+        S3BridgeClient = _import_or_skip('src.universal_s3_client').S3BridgeClient
         
         # Mock S3 client
         mock_s3 = Mock()
@@ -381,9 +423,7 @@ class TestS3Client(unittest.TestCase):
         mock_s3.get_object.return_value = {'Body': Mock(read=lambda: b'{"test": "data"}')}
         mock_s3.put_object.return_value = {}
         mock_s3.delete_object.return_value = {}
-        mock_s3.get_paginator.return_value.paginate.return_value = [
-            {'Contents': [{'Key': 'test/file1.json'}, {'Key': 'test/file2.json'}]}
-        ]
+        mock_s3.get_paginator.return_value.paginate.return_value = LIST_PAGES
         
         client = S3BridgeClient("test-bucket", "universal")
         
@@ -407,13 +447,15 @@ class TestS3Client(unittest.TestCase):
             self.assertEqual(len(objects), 2)
             
             self.assertTrue(client.delete_object('test.json'))
+            
+            # Batch delete splits into requests of at most 1000 keys
+            mock_s3.delete_objects.return_value = {}
+            self.assertTrue(client.delete_objects([f'key-{i}' for i in range(1500)]))
+            self.assertEqual(mock_s3.delete_objects.call_count, 2)
     
     def test_s3_error_handling(self):
         """Test S3 error handling"""
-        try:
-            from src.universal_s3_client import S3BridgeClient
-        except ImportError:
-            self.skipTest("universal_s3_client module not available")
+        S3BridgeClient = _import_or_skip('src.universal_s3_client').S3BridgeClient
         
         client = S3BridgeClient("test-bucket", "universal")
         
@@ -439,10 +481,7 @@ class TestConfigManagement(unittest.TestCase):
         mock_sts.get_caller_identity.return_value = {'Account': '123456789012'}
         mock_boto3.return_value = mock_sts
         
-        try:
-            from config.aws_config import AWSConfig
-        except ImportError:
-            self.skipTest("aws_config module not available")
+        AWSConfig = _import_or_skip('config.aws_config').AWSConfig
         
         config = AWSConfig()
         self.assertEqual(config.account_id, '123456789012')
@@ -450,10 +489,7 @@ class TestConfigManagement(unittest.TestCase):
     
     def test_deployment_config_save_load(self):
         """Test deployment configuration save/load"""
-        try:
-            from config.aws_config import AWSConfig
-        except ImportError:
-            self.skipTest("aws_config module not available")
+        AWSConfig = _import_or_skip('config.aws_config').AWSConfig
         
         with patch('boto3.client'):
             config = AWSConfig()
@@ -484,10 +520,7 @@ class TestConfigManagement(unittest.TestCase):
     @patch('boto3.client')
     def test_deployment_status_check(self, mock_boto3):
         """Test deployment status checking"""
-        try:
-            from config.aws_config import AWSConfig
-        except ImportError:
-            self.skipTest("aws_config module not available")
+        AWSConfig = _import_or_skip('config.aws_config').AWSConfig
         
         mock_cf = Mock()
         mock_boto3.return_value = mock_cf
@@ -505,10 +538,7 @@ class TestConfigManagement(unittest.TestCase):
     @patch('boto3.client')
     def test_api_gateway_url_retrieval(self, mock_boto3):
         """Test API Gateway URL retrieval"""
-        try:
-            from config.aws_config import AWSConfig
-        except ImportError:
-            self.skipTest("aws_config module not available")
+        AWSConfig = _import_or_skip('config.aws_config').AWSConfig
         
         mock_cf = Mock()
         mock_boto3.return_value = mock_cf
@@ -532,6 +562,32 @@ class TestConfigManagement(unittest.TestCase):
         mock_cf.describe_stacks.side_effect = Exception("Failed")
         url = config.get_api_gateway_url()
         self.assertIsNone(url)
+    
+    @patch.dict(os.environ, {}, clear=True)
+    def test_instance_identity(self):
+        """Test the IMDS identity shortcut on and off EC2"""
+        aws_config = _import_or_skip('config.aws_config')
+        
+        token_response = Mock(text='imds-token')
+        info_response = Mock(status_code=200)
+        info_response.json.return_value = {
+            'Code': 'Success',
+            'InstanceProfileArn': 'arn:aws:iam::123456789012:instance-profile/app',
+            'InstanceProfileId': 'AIPAEXAMPLE'
+        }
+        
+        with patch.object(aws_config, '_on_ec2', return_value=True), \
+                patch('requests.put', return_value=token_response), \
+                patch('requests.get', return_value=info_response) as mock_get:
+            identity = aws_config.instance_identity()
+            self.assertEqual(identity['Account'], '123456789012')
+            self.assertEqual(mock_get.call_args.kwargs['headers'], {'X-aws-ec2-metadata-token': 'imds-token'})
+        
+        # Off EC2 IMDS is never contacted
+        with patch.object(aws_config, '_on_ec2', return_value=False), \
+                patch('requests.put') as mock_put:
+            self.assertIsNone(aws_config.instance_identity())
+            mock_put.assert_not_called()
 
 
 class TestErrorHandling(unittest.TestCase):
@@ -539,10 +595,7 @@ class TestErrorHandling(unittest.TestCase):
     
     def test_missing_environment_variables(self):
         """Test behavior when environment variables are missing"""
-        try:
-            from src.universal_auth import S3BridgeAuthProvider
-        except ImportError:
-            self.skipTest("universal_auth module not available")
+        S3BridgeAuthProvider = _import_or_skip('src.universal_auth').S3BridgeAuthProvider
         
         # Clear environment
         with patch.dict(os.environ, {}, clear=True):
@@ -559,10 +612,7 @@ class TestErrorHandling(unittest.TestCase):
     
     def test_invalid_service_patterns(self):
         """Test invalid service patterns"""
-        try:
-            from src.universal_s3_client import S3BridgeClient
-        except ImportError:
-            self.skipTest("universal_s3_client module not available")
+        S3BridgeClient = _import_or_skip('src.universal_s3_client').S3BridgeClient
         
         # Test with non-existent service
         with self.assertRaises(ValueError):
@@ -570,10 +620,7 @@ class TestErrorHandling(unittest.TestCase):
     
     def test_network_failures(self):
         """Test network failure handling"""
-        try:
-            from src.universal_auth import S3BridgeAuthProvider
-        except ImportError:
-            self.skipTest("universal_auth module not available")
+        S3BridgeAuthProvider = _import_or_skip('src.universal_auth').S3BridgeAuthProvider
         
         auth = S3BridgeAuthProvider("test")
         
@@ -582,7 +629,7 @@ class TestErrorHandling(unittest.TestCase):
             mock_config.get_api_gateway_url.return_value = 'https://test-api.amazonaws.com'
             
             with patch.object(auth, '_get_api_key', return_value='test-key'):
-                with patch('requests.get') as mock_get:
+                with patch('requests.Session.get') as mock_get:
                     mock_get.side_effect = Exception("Network error")
                     
                     with self.assertRaises(Exception) as context:
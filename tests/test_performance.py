@@ -3,18 +3,60 @@ Performance Tests for S3Bridge
 Tests performance characteristics and load handling
 """
 
+import gc
 import os
 import sys
 import json
 import time
 import threading
+import tracemalloc
 import unittest
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
 from unittest.mock import Mock, patch
 from pathlib import Path
+from types import MappingProxyType
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+# Add src and scripts to path
+project_root = Path(__file__).parent.parent
+for path in (project_root / 'src', project_root / 'scripts'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+# The scripts only create boto3 clients inside their functions, so importing
+# them once here is safe under the per-test boto3.client patches
+import add_service
+import list_services
+
+# Import the src modules once and resolve their classes at call time, so the
+# per-test patches on S3BridgeAuthProvider and S3BridgeClient still apply
+from src import universal_auth, universal_s3_client
+
+# Payload every mocked read_json returns; read-only so the workers can share it
+READ_RESULT = MappingProxyType({'test': 'data'})
+
+
+def _is_instrumented():
+    """Whether a tracer, coverage, dev mode or tracemalloc is slowing this interpreter"""
+    coverage = sys.modules.get('coverage')
+    if coverage is not None and coverage.Coverage.current() is not None:
+        return True
+    return bool(sys.flags.dev_mode) or sys.gettrace() is not None or tracemalloc.is_tracing()
+
+# Wall-clock limits are meaningless under instrumentation, so the timed tests step aside
+skip_if_instrumented = unittest.skipIf(_is_instrumented(), "instrumented runtime skews perf timings")
+
+
+@contextmanager
+def _no_gc():
+    """Keep collector pauses out of a timed block"""
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+        gc.collect()
 
 class TestPerformance(unittest.TestCase):
     """Performance and load tests"""
@@ -23,75 +65,79 @@ class TestPerformance(unittest.TestCase):
         """Set up performance test environment"""
         self.test_service = "perf-test"
         self.test_bucket = "perf-test-bucket"
+        
+        # Patch the provider class once here instead of in each test that needs it
+        patcher = patch('src.universal_auth.S3BridgeAuthProvider', new_callable=Mock)
+        self.mock_auth_provider = patcher.start()
+        self.addCleanup(patcher.stop)
     
-    @patch('src.universal_auth.S3BridgeAuthProvider')
-    def test_credential_caching_performance(self, mock_auth_provider):
+    def test_credential_caching_performance(self):
         """Test credential caching reduces API calls"""
         
-        # Mock auth provider with call counting
-        mock_auth_instance = Mock()
-        call_count = 0
-        
-        def mock_fetch_credentials():
-            nonlocal call_count
-            call_count += 1
-            return {
-                'access_key': 'AKIA123',
-                'secret_key': 'secret123',
-                'session_token': 'token123'
-            }
-        
-        mock_auth_instance._fetch_fresh_credentials = mock_fetch_credentials
-        mock_auth_instance.credentials_expired.return_value = False
-        mock_auth_instance._cached_credentials = None
-        
-        # First call should fetch credentials
-        mock_auth_instance.get_credentials.side_effect = lambda: (
-            mock_fetch_credentials() if mock_auth_instance._cached_credentials is None
-            else mock_auth_instance._cached_credentials
-        )
-        
-        mock_auth_provider.return_value = mock_auth_instance
+        # Plain provider double: real methods and slots, no Mock attribute machinery
+        class _FakeProvider:
+            __slots__ = ('_cached_credentials', 'fetch_count')
+            
+            def __init__(self):
+                self._cached_credentials = None
+                self.fetch_count = 0
+            
+            def _fetch_fresh_credentials(self):
+                self.fetch_count += 1
+                return {
+                    'access_key': 'AKIA123',
+                    'secret_key': 'secret123',
+                    'session_token': 'token123'
+                }
+            
+            def get_credentials(self):
+                # First call should fetch credentials
+                if self._cached_credentials is None:
+                    self._cached_credentials = self._fetch_fresh_credentials()
+                return self._cached_credentials
         
-        from src.universal_auth import S3BridgeAuthProvider
+        fake_provider = _FakeProvider()
+        self.mock_auth_provider.return_value = fake_provider
         
-        auth = S3BridgeAuthProvider(self.test_service)
+        auth = universal_auth.S3BridgeAuthProvider(self.test_service)
         
         # Simulate multiple credential requests
         for _ in range(10):
             auth.get_credentials()
         
         # Should only call fetch once due to caching
-        self.assertEqual(call_count, 1)
+        self.assertEqual(fake_provider.fetch_count, 1)
     
     @patch('src.universal_s3_client.S3BridgeClient')
     def test_concurrent_s3_operations(self, mock_s3_client):
         """Test concurrent S3 operations"""
         
-        # Mock S3 client with operation tracking
-        operation_times = []
+        # Mock S3 client with operation tracking; deque.append is thread-safe
+        # and never reallocates, so the workers need no lock around it
+        operation_times = deque()
+        
+        # Every operation waits until max_workers operations are in flight at once,
+        # which proves the pool runs them concurrently without sleeping to find out
+        max_workers = 5
+        barrier = threading.Barrier(max_workers)
         
         def mock_operation():
-            start_time = time.time()
-            time.sleep(0.01)  # Simulate operation time
-            end_time = time.time()
-            operation_times.append(end_time - start_time)
+            barrier.wait(timeout=5)  # BrokenBarrierError unless the operations overlap
+            operation_times.append(time.perf_counter_ns())
             return True
         
-        mock_s3_instance = Mock()
+        # Narrow specs stop stray attribute access from spawning child mocks
+        mock_s3_instance = Mock(spec=['write_json', 'read_json'])
         mock_s3_instance.write_json.side_effect = lambda *args: mock_operation()
-        mock_s3_instance.read_json.side_effect = lambda *args: mock_operation() and {'test': 'data'}
+        mock_s3_instance.read_json.side_effect = lambda *args: mock_operation() and READ_RESULT
         mock_s3_client.return_value = mock_s3_instance
         
-        from src.universal_s3_client import S3BridgeClient
-        
-        client = S3BridgeClient(self.test_bucket, self.test_service)
+        client = universal_s3_client.S3BridgeClient(self.test_bucket, self.test_service)
         
-        # Test concurrent operations
+        # Test concurrent operations; a multiple of max_workers so every barrier round fills
         num_operations = 20
-        start_time = time.time()
         
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with _no_gc(), ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = []
             
             for i in range(num_operations):
@@ -101,53 +147,65 @@ class TestPerformance(unittest.TestCase):
                     future = executor.submit(client.read_json, f'test_{i}.json')
                 futures.append(future)
             
-            # Wait for all operations to complete
-            for future in as_completed(futures):
-                result = future.result()
-        
-        total_time = time.time() - start_time
+            # Only completion matters here, so join them all in one wait and
+            # then surface any worker exception
+            done, _ = wait(futures)
+            for future in done:
+                future.result()
         
-        # Verify all operations completed
+        # Verify all operations completed, max_workers at a time
         self.assertEqual(len(operation_times), num_operations)
-        
-        # Concurrent operations should be faster than sequential
-        expected_sequential_time = num_operations * 0.01
-        self.assertLess(total_time, expected_sequential_time * 0.8)
     
     def test_memory_usage_stability(self):
         """Test memory usage remains stable under load"""
-        import gc
+        # One provider mock is reused for every iteration and its call records are
+        # cleared each time, so the growth reflects the loop rather than mock bookkeeping
+        mock_auth_instance = Mock(spec=['get_credentials'])
+        mock_auth_instance.get_credentials.return_value = {
+            'access_key': 'AKIA123',
+            'secret_key': 'secret123',
+            'session_token': 'token123'
+        }
+        self.mock_auth_provider.return_value = mock_auth_instance
         
-        # Get initial memory usage (approximate)
-        gc.collect()
-        initial_objects = len(gc.get_objects())
+        # Build the service names up front so their strings are not counted as growth
+        service_names = tuple(f"test-service-{i}" for i in range(100))
         
-        # Simulate heavy usage
-        with patch('src.universal_auth.S3BridgeAuthProvider') as mock_auth:
-            mock_auth_instance = Mock()
-            mock_auth_instance.get_credentials.return_value = {
-                'access_key': 'AKIA123',
-                'secret_key': 'secret123',
-                'session_token': 'token123'
-            }
-            mock_auth.return_value = mock_auth_instance
-            
-            from src.universal_auth import S3BridgeAuthProvider
-            
+        def churn(names):
             # Create and destroy many auth providers
-            for i in range(100):
-                auth = S3BridgeAuthProvider(f"test-service-{i}")
+            for name in names:
+                auth = universal_auth.S3BridgeAuthProvider(name)
                 auth.get_credentials()
                 del auth
-        
-        # Force garbage collection
-        gc.collect()
-        final_objects = len(gc.get_objects())
+                self.mock_auth_provider.reset_mock()
+        
+        # Trace only this test's allocations, unlike gc.get_objects() which
+        # walks every object other loaded test modules left in the process
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            # Warm up first so one-time caches are not counted as growth
+            churn(service_names[:1])
+            # The warm-up garbage is all fresh, so a young-generation pass is
+            # enough here; the full collection is kept for the final snapshot
+            gc.collect(0)
+            before = tracemalloc.take_snapshot()
+            
+            # Simulate heavy usage
+            churn(service_names)
+            gc.collect()
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
         
         # Memory usage should not grow significantly
-        object_growth = final_objects - initial_objects
-        self.assertLess(object_growth, 50, "Memory usage grew too much")
+        growth = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+        print(f"Memory growth over 100 providers: {growth} bytes")
+        self.assertLess(growth, 64 * 1024, "Memory usage grew too much")
     
+    @skip_if_instrumented
     @patch('boto3.client')
     def test_service_management_performance(self, mock_boto3):
         """Test service management operation performance"""
@@ -157,11 +215,10 @@ class TestPerformance(unittest.TestCase):
         mock_lambda = Mock()
         mock_sts = Mock()
         
-        mock_boto3.side_effect = lambda service: {
-            'iam': mock_iam,
-            'lambda': mock_lambda,
-            'sts': mock_sts
-        }[service]
+        # Bind the mapping once; boto3.client is called with config= too, so
+        # the lookup needs a wrapper rather than clients.__getitem__
+        clients = {'iam': mock_iam, 'lambda': mock_lambda, 'sts': mock_sts}
+        mock_boto3.side_effect = lambda service, **kwargs: clients[service]
         
         mock_sts.get_caller_identity.return_value = {'Account': '123456789012'}
         mock_iam.create_role.return_value = {'Role': {'Arn': 'test-arn'}}
@@ -169,54 +226,45 @@ class TestPerformance(unittest.TestCase):
             'Environment': {'Variables': {'AWS_ACCOUNT_ID': '123456789012'}}
         }
         
-        # Add scripts to path
-        sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
-        
-        import add_service as add_service_module
-        
         # Time service addition
-        start_time = time.time()
-        
-        for i in range(5):
-            service_name = f"perf-test-{i}"
-            bucket_patterns = [f"perf-test-{i}-*"]
-            result = add_service_module.add_service(service_name, bucket_patterns, 'read-write')
-            self.assertTrue(result)
-        
-        total_time = time.time() - start_time
-        avg_time_per_service = total_time / 5
+        with _no_gc():
+            start_time = time.perf_counter_ns()
+            
+            for i in range(5):
+                service_name = f"perf-test-{i}"
+                bucket_patterns = [f"perf-test-{i}-*"]
+                result = add_service.add_service(service_name, bucket_patterns, 'read-write')
+                self.assertTrue(result)
+            
+            total_ns = time.perf_counter_ns() - start_time
+        avg_ns_per_service = total_ns // 5
         
         # Each service addition should complete reasonably quickly
-        self.assertLess(avg_time_per_service, 2.0, "Service addition too slow")
+        self.assertLess(avg_ns_per_service, 2_000_000_000, "Service addition too slow")
     
+    @skip_if_instrumented
     def test_error_handling_performance(self):
         """Test error handling doesn't significantly impact performance"""
         
-        with patch('src.universal_auth.S3BridgeAuthProvider') as mock_auth:
-            # Mock auth provider that fails initially then succeeds
-            mock_auth_instance = Mock()
-            call_count = 0
-            
-            def mock_get_credentials():
-                nonlocal call_count
-                call_count += 1
-                if call_count <= 3:
-                    raise Exception("Temporary failure")
-                return {
-                    'access_key': 'AKIA123',
-                    'secret_key': 'secret123',
-                    'session_token': 'token123'
-                }
-            
-            mock_auth_instance.get_credentials.side_effect = mock_get_credentials
-            mock_auth.return_value = mock_auth_instance
-            
-            from src.universal_auth import S3BridgeAuthProvider
-            
-            auth = S3BridgeAuthProvider(self.test_service)
-            
-            # Time error handling
-            start_time = time.time()
+        # Mock auth provider that fails initially then succeeds
+        mock_auth_instance = Mock(spec=['get_credentials'])
+        mock_auth_instance.get_credentials.side_effect = [
+            Exception("Temporary failure"),
+            Exception("Temporary failure"),
+            Exception("Temporary failure"),
+            {
+                'access_key': 'AKIA123',
+                'secret_key': 'secret123',
+                'session_token': 'token123'
+            }
+        ]
+        self.mock_auth_provider.return_value = mock_auth_instance
+        
+        auth = universal_auth.S3BridgeAuthProvider(self.test_service)
+        
+        # Time error handling
+        with _no_gc():
+            start_time = time.perf_counter_ns()
             
             try:
                 # This should fail 3 times then succeed
@@ -229,76 +277,78 @@ class TestPerformance(unittest.TestCase):
             except Exception:
                 pass
             
-            error_handling_time = time.time() - start_time
-            
-            # Error handling should not take too long
-            self.assertLess(error_handling_time, 1.0, "Error handling too slow")
+            error_handling_ns = time.perf_counter_ns() - start_time
+        
+        # Error handling should not take too long
+        self.assertLess(error_handling_ns, 1_000_000_000, "Error handling too slow")
 
 class TestScalability(unittest.TestCase):
     """Scalability tests"""
     
-    @patch('boto3.client')
-    def test_many_services_performance(self, mock_boto3):
-        """Test performance with many services configured"""
-        
-        # Mock Lambda with many services
-        mock_lambda = Mock()
-        mock_iam = Mock()
-        
-        mock_boto3.side_effect = lambda service: {
-            'lambda': mock_lambda,
-            'iam': mock_iam
-        }[service]
+    @classmethod
+    def setUpClass(cls):
+        """Build the 50-service Lambda environment and IAM roles once"""
+        # Format each service name once and share it between both fixtures
+        service_names = tuple(f"service_{i:02d}" for i in range(50))
         
-        # Create mock configuration with 50 services
         services_config = {}
-        for i in range(50):
-            service_name = f"service_{i:02d}"
+        for service_name in service_names:
             services_config[f'SERVICE_{service_name.upper()}'] = json.dumps({
                 'role': f'arn:aws:iam::123456789012:role/service-role/{service_name}-s3-access-role',
                 'buckets': [f'{service_name}-*']
             })
         
         services_config['AWS_ACCOUNT_ID'] = '123456789012'
-        
-        mock_lambda.get_function.return_value = {
-            'Configuration': {
-                'Environment': {'Variables': services_config}
-            }
-        }
+        # Read-only so no test can change what the next one sees
+        cls._services_config = MappingProxyType(services_config)
         
         # Mock IAM roles
-        mock_roles = []
-        for i in range(50):
-            service_name = f"service_{i:02d}"
-            mock_roles.append({
+        cls._mock_roles = tuple(
+            MappingProxyType({
                 'RoleName': f'{service_name}-s3-access-role',
                 'Arn': f'arn:aws:iam::123456789012:role/service-role/{service_name}-s3-access-role',
                 'CreateDate': '2024-01-01T00:00:00Z',
                 'Description': f'Service {i}'
             })
+            for i, service_name in enumerate(service_names)
+        )
+    
+    @skip_if_instrumented
+    @patch('boto3.client')
+    def test_many_services_performance(self, mock_boto3):
+        """Test performance with many services configured"""
         
-        mock_iam.list_roles.return_value = {'Roles': mock_roles}
-        
-        # Add scripts to path
-        sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts'))
+        # Mock Lambda with many services
+        mock_lambda = Mock()
+        mock_iam = Mock()
         
-        import list_services
+        clients = {'lambda': mock_lambda, 'iam': mock_iam}
+        mock_boto3.side_effect = lambda service, **kwargs: clients[service]
         
-        # Time service listing with many services
-        start_time = time.time()
+        # Mock configuration with 50 services
+        mock_lambda.get_function.return_value = {
+            'Configuration': {
+                'Environment': {'Variables': self._services_config}
+            }
+        }
         
-        services = list_services.get_service_config()
-        roles = list_services.get_service_roles()
+        mock_iam.get_paginator.return_value.paginate.return_value = [{'Roles': self._mock_roles}]
         
-        list_time = time.time() - start_time
+        # Time service listing with many services
+        with _no_gc():
+            start_time = time.perf_counter_ns()
+            
+            services = list_services.get_service_config()
+            roles = list_services.get_service_roles()
+            
+            list_ns = time.perf_counter_ns() - start_time
         
         # Verify all services loaded
         self.assertEqual(len(services), 51)  # 50 + universal
         self.assertEqual(len(roles), 50)
         
         # Should complete quickly even with many services
-        self.assertLess(list_time, 1.0, "Service listing too slow with many services")
+        self.assertLess(list_ns, 1_000_000_000, "Service listing too slow with many services")
 
 
 def run_performance_tests():